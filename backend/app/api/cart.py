@@ -1,40 +1,78 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database.session import get_db
-from app.schemas.cart import CartRequest, CartTotalsResponse, SaveCartRequest
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.config import settings
+from app.database.session import get_async_db
+from app.database.replicas import get_async_read_db
+from app.schemas.cart import (
+    CartRequest, CartTotalsResponse, SaveCartRequest, CartOptimizeRequest, CartOptimizeResponse,
+    CartDeltaRequest, CartSessionResponse
+)
 from app.services.product_service import ProductService
-from app.models.search_query import SearchQuery
-from datetime import datetime
+from app.services.cart_sessions import CartSessionService
+from app.services import cart_saves
 
 router = APIRouter()
 
 @router.post("/calculate", response_model=CartTotalsResponse)
-def calculate_cart_totals(cart: CartRequest, db: Session = Depends(get_db)):
+async def calculate_cart_totals(cart: CartRequest, db: AsyncSession = Depends(get_async_read_db)):
     """
     Calcular el total de la lista de compras en cada tienda
     """
-    service = ProductService(db)
-    return service.calculate_cart_totals(cart.items)
+    return await ProductService(db).calculate_cart_totals(cart.items)
 
-@router.post("/save")
-def save_cart(cart: SaveCartRequest, db: Session = Depends(get_db)):
+@router.post("/calculate-batch", response_model=List[CartTotalsResponse])
+async def calculate_cart_totals_batch(carts: List[CartRequest], db: AsyncSession = Depends(get_async_read_db)):
     """
-    Guardar el carrito en la base de datos
+    Calcular los totales por tienda de varios carritos en una sola llamada.
+    Retorna un resultado por carrito, en el mismo orden.
     """
-    cart_data = {
-        "type": "cart",
-        "items": cart.items,
-        "totals": cart.totals,
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    
-    search_record = SearchQuery(query_data=cart_data)
-    db.add(search_record)
-    db.commit()
-    db.refresh(search_record)
+    if len(carts) > settings.CART_BATCH_MAX_CARTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.CART_BATCH_MAX_CARTS} carritos por request"
+        )
     
-    return {
-        "id": search_record.id,
-        "message": "Carrito guardado exitosamente",
-        "created_at": search_record.created_at
-    }
\ No newline at end of file
+    return await ProductService(db).calculate_cart_totals_batch([cart.items for cart in carts])
+
+@router.post("/optimize", response_model=CartOptimizeResponse)
+async def optimize_cart(request: CartOptimizeRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Calcular el plan de compra más barato repartiendo los productos
+    entre como máximo `max_stores` tiendas
+    """
+    return await ProductService(db).optimize_cart(request)
+
+@router.post("/sessions", response_model=CartSessionResponse)
+async def create_cart_session(cart: CartRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Crear una sesión de carrito en el servidor.
+    Luego el cliente envía solo los cambios a /sessions/{session_id}/deltas.
+    """
+    return await CartSessionService(db).create(cart.items)
+
+@router.get("/sessions/{session_id}", response_model=CartSessionResponse)
+async def get_cart_session(session_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    """Items y totales actuales de la sesión (404 si expiró)"""
+    return await CartSessionService(db).get(session_id)
+
+@router.post("/sessions/{session_id}/deltas", response_model=CartSessionResponse)
+async def apply_cart_deltas(session_id: str, request: CartDeltaRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Aplicar cambios al carrito (add, remove, set) y retornar los totales
+    por tienda, iguales a los de /calculate con los mismos items
+    """
+    return await CartSessionService(db).apply_deltas(session_id, request.deltas)
+
+@router.delete("/sessions/{session_id}")
+async def delete_cart_session(session_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    CartSessionService(db).delete(session_id)
+    return {"message": "Sesión eliminada"}
+
+@router.post("/save")
+async def save_cart(cart: SaveCartRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Guardar el carrito en la base de datos.
+    Responde de inmediato; el INSERT se hace por lotes en segundo plano.
+    """
+    return await cart_saves.save_cart(db, cart)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from pydantic import BaseModel
-from app.database.session import get_db
+from app.database.replicas import get_async_read_db
 from app.models.category import Category
+from app.api.http_cache import conditional_json
 
 router = APIRouter()
 
@@ -15,7 +17,10 @@ class CategoryResponse(BaseModel):
         from_attributes = True
 
 @router.get("/", response_model=List[CategoryResponse])
-def list_categories(db: Session = Depends(get_db)):
-    """Listar todas las categorías disponibles"""
-    categories = db.query(Category).order_by(Category.name).all()
-    return categories
\ No newline at end of file
+async def list_categories(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Listar todas las categorías disponibles (soporta If-None-Match)"""
+    async def produce():
+        categories = (await db.scalars(select(Category).order_by(Category.name))).all()
+        return [CategoryResponse.model_validate(c) for c in categories]
+    
+    return await conditional_json(request, "categories", produce)
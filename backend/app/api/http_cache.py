@@ -0,0 +1,63 @@
+"""
+Respuestas condicionales (ETag / If-None-Match) para endpoints del catálogo
+"""
+
+import hashlib
+from typing import Any, Awaitable, Callable, Hashable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.services.catalog_version import catalog_generation, catalog_generation_is_current
+from app.services.response_cache import ResponseCache
+
+# ETag vigente por recurso: permite responder 304 sin tocar la base de datos
+_etags = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+def _cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.CATALOG_CACHE_MAX_AGE}, must-revalidate",
+    }
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparar contra If-None-Match (admite listas y '*')"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def conditional_json(request: Request, key: Hashable,
+                           produce: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    Responder `await produce()` como JSON con ETag fuerte.
+    - El ETag combina la generación del catálogo y un hash del contenido
+    - Si el cliente envía un If-None-Match igual al ETag vigente conocido,
+      se responde 304 sin ejecutar `produce` (sin consultar la BD). Solo
+      mientras la generación local esté confirmada contra catalog_version:
+      si no, se recalcula el contenido antes de comparar
+    """
+    generation = catalog_generation()
+    if_none_match = request.headers.get("if-none-match")
+
+    if catalog_generation_is_current():
+        known = _etags.get(key, generation)
+        if known is not None and _etag_matches(if_none_match, known):
+            return Response(status_code=304, headers=_cache_headers(known))
+
+    response = JSONResponse(content=jsonable_encoder(await produce()))
+    digest = hashlib.sha256(response.body).hexdigest()[:20]
+    etag = f'"{generation}-{digest}"'
+    _etags.set(key, etag, generation)
+
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+
+    response.headers.update(_cache_headers(etag))
+    return response
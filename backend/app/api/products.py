@@ -1,42 +1,149 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database.session import get_db
-from app.schemas.product import ProductResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from app.database.replicas import get_async_read_db
+from app.config import settings
+from app.schemas.product import (
+    ProductResponse, ProductPageResponse, ProductBatchRequest, ProductBatchResponse,
+    SearchFacetsResponse, SearchResultsResponse, SuggestionResponse, SearchSort, PriceHistoryResponse
+)
 from app.services.product_service import ProductService
+from app.services.price_history import PriceHistoryService
+from app.services.autocomplete import suggestion_index, MAX_SUGGESTIONS
+from app.services.analytics_service import AnalyticsService
+from app.api.http_cache import conditional_json
 
 router = APIRouter()
 
-@router.get("/search", response_model=List[ProductResponse])
-def search_products(
+@router.get("/search", response_model=Union[SearchResultsResponse, List[ProductResponse]])
+async def search_products(
     q: Optional[str] = Query(None, description="Término de búsqueda"),
     category_id: Optional[int] = Query(None, description="Filtrar por categoría"),
-    db: Session = Depends(get_db)
+    sort: SearchSort = Query("relevance", description="relevance, unit_price (por unidad y precio por kg/l/unidad) o price (precio más bajo)"),
+    include_facets: bool = Query(False, description="Incluir los conteos por categoría, marca y tienda"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Buscar productos por nombre Y/O categoría.
     Permite buscar solo por texto, solo por categoría o ambos.
+    - Sin include_facets: retorna una lista
+    - Con include_facets=true: retorna {items, facets} (mismas facetas que
+      /search/facets, en la misma request)
+    Lee de una réplica al día (o de la principal), como el resto del catálogo.
     """
-    service = ProductService(db)
-    
     # Validación: Si no envía NADA, retornamos lista vacía para no traer toda la base de datos
     if not q and not category_id:
+        if include_facets:
+            return SearchResultsResponse(items=[], facets=SearchFacetsResponse(categories=[], brands=[], stores=[]))
+        return []
+    
+    service = ProductService(db)
+    items = await service.search_products(q, category_id, sort)
+    if q and settings.SEARCH_LOG_ENABLED:
+        AnalyticsService(db).log_search(q, len(items), {"category_id": category_id, "sort": sort})
+    if include_facets:
+        return SearchResultsResponse(items=items, facets=await service.search_facets(q, category_id))
+    return items
+
+@router.get("/search/facets", response_model=SearchFacetsResponse)
+async def search_facets(
+    q: Optional[str] = Query(None, description="Término de búsqueda"),
+    category_id: Optional[int] = Query(None, description="Filtrar por categoría"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Conteos de resultados por categoría, marca y tienda para la misma
+    búsqueda que /search (todos los resultados, no solo la primera página).
+    """
+    if not q and not category_id:
+        return SearchFacetsResponse(categories=[], brands=[], stores=[])
+    
+    return await ProductService(db).search_facets(q, category_id)
+
+@router.get("/suggest", response_model=List[SuggestionResponse])
+async def suggest(
+    q: str = Query(..., min_length=1, description="Texto escrito hasta el momento"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)
+):
+    """
+    Autocompletar nombres de productos y marcas.
+    Responde desde memoria (sin consultar la base de datos); retorna una
+    lista vacía mientras el índice se construye.
+    """
+    index = suggestion_index.get()
+    if index is None:
         return []
-        
-    return service.search_products(q, category_id)
+    
+    return [
+        SuggestionResponse(text=s.text, kind=s.kind)
+        for s in index.suggest(q, limit)
+    ]
+
+def _parse_ids(ids: str) -> List[int]:
+    """Convertir '1,2,3' en [1, 2, 3]"""
+    try:
+        return [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="IDs inválidos, usar ids=1,2,3")
+
+async def _get_batch(product_ids: List[int], db: AsyncSession) -> ProductBatchResponse:
+    if len(product_ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.PRODUCT_BATCH_MAX_IDS} productos por consulta"
+        )
+    return await ProductService(db).get_products_by_ids(product_ids)
+
+@router.get("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    ids: str = Query(..., description="IDs separados por coma (ej: 1,2,3)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Obtener varios productos en una sola llamada (mantiene el orden de los IDs)"""
+    return await _get_batch(_parse_ids(ids), db)
+
+@router.post("/batch", response_model=ProductBatchResponse)
+async def post_products_batch(request: ProductBatchRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """Variante POST de /batch para listas largas de IDs"""
+    return await _get_batch(request.ids, db)
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Obtener un producto específico con todos sus precios"""
-    service = ProductService(db)
-    return service.get_product_by_id(product_id)
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Obtener un producto específico con todos sus precios (soporta If-None-Match)"""
+    return await conditional_json(
+        request, ("product", product_id), lambda: ProductService(db).get_product_by_id(product_id)
+    )
+
+@router.get("/{product_id}/history", response_model=PriceHistoryResponse)
+async def get_price_history(
+    product_id: int,
+    request: Request,
+    days: int = Query(90, ge=1, le=settings.PRICE_HISTORY_MAX_DAYS),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Precios del producto en cada tienda durante los últimos `days` días"""
+    return await conditional_json(
+        request, ("history", product_id, days), lambda: PriceHistoryService(db).get_history(product_id, days)
+    )
 
-@router.get("/", response_model=List[ProductResponse])
-def list_products(
+@router.get("/", response_model=Union[ProductPageResponse, List[ProductResponse]])
+async def list_products(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor de paginación (vacío para la primera página)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Listar productos (paginado)"""
-    service = ProductService(db)
-    return service.list_products(skip, limit)
\ No newline at end of file
+    """
+    Listar productos (paginado).
+    - Con `cursor`: paginación por cursor, retorna {items, next_cursor}
+    - Sin `cursor`: paginación por offset (skip/limit), retorna una lista
+    """
+    if cursor is not None:
+        if not 1 <= limit <= settings.PRODUCT_PAGE_MAX_LIMIT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"limit debe estar entre 1 y {settings.PRODUCT_PAGE_MAX_LIMIT} con cursor"
+            )
+        return await ProductService(db).list_products_page(cursor, limit)
+    
+    return await ProductService(db).list_products(skip, limit)
\ No newline at end of file
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from pydantic import BaseModel
-from app.database.session import get_db
+from app.database.replicas import get_async_read_db
 from app.models.store import Store
+from app.api.http_cache import conditional_json
 
 router = APIRouter()
 
@@ -16,7 +18,10 @@ class StoreResponse(BaseModel):
         from_attributes = True
 
 @router.get("/", response_model=List[StoreResponse])
-def list_stores(db: Session = Depends(get_db)):
-    """Listar todas las tiendas disponibles"""
-    stores = db.query(Store).all()
-    return stores
\ No newline at end of file
+async def list_stores(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Listar todas las tiendas disponibles (soporta If-None-Match)"""
+    async def produce():
+        stores = (await db.scalars(select(Store).order_by(Store.id))).all()
+        return [StoreResponse.model_validate(s) for s in stores]
+    
+    return await conditional_json(request, "stores", produce)
@@ -5,10 +5,94 @@ class Settings(BaseSettings):
     APP_NAME: str = "AhorraQP"
     DEBUG: bool = False
     
+    # Pool de conexiones del motor asíncrono (API)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    # Pool del motor síncrono (scrapers, scripts, escrituras diferidas)
+    DB_SYNC_POOL_SIZE: int = 2
+    DB_SYNC_MAX_OVERFLOW: int = 2
+    # Comunes a ambos motores (segundos)
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    # True detrás de un pooler en modo transacción (PgBouncer, pooler de
+    # Supabase en el puerto 6543): sin prepared statements en el servidor
+    DB_TRANSACTION_POOLER: bool = False
+    
+    # Réplicas de lectura (URLs separadas por coma; vacío = todo a la principal)
+    DATABASE_REPLICA_URLS: str = ""
+    # Atraso máximo aceptado antes de leer de la principal
+    REPLICA_MAX_LAG_SECONDS: float = 30.0
+    # Cada cuánto se vuelve a consultar el atraso de cada réplica
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    
     # Configuración de scraping
     SCRAPER_TIMEOUT: int = 30
     HEADLESS_BROWSER: bool = True
     
+    # Configuración de búsqueda
+    # "trigram": índices GIN pg_trgm (requiere scripts/add_search_indexes.py;
+    #            sin f_unaccent/pg_trgm la API usa "ilike" hasta reiniciarse)
+    # "ilike": búsqueda simple sin índices (compatibilidad)
+    SEARCH_BACKEND: str = "trigram"
+    SEARCH_MAX_RESULTS: int = 50
+    # Candidatos que se traen de la base de datos para rankear con BM25
+    SEARCH_CANDIDATES: int = 500
+    
+    # Índice de búsqueda en memoria (evita consultas a PostgreSQL)
+    SEARCH_IN_MEMORY: bool = False
+    # Máximo de IDs por consulta en /api/products/batch
+    PRODUCT_BATCH_MAX_IDS: int = 200
+    # Máximo de productos por página con cursor (el modo skip/limit no tiene tope)
+    PRODUCT_PAGE_MAX_LIMIT: int = 500
+    
+    # Historial de precios (tabla price_history particionada por mes)
+    PRICE_HISTORY_MONTHS_AHEAD: int = 2        # particiones creadas por adelantado
+    PRICE_HISTORY_RETENTION_MONTHS: int = 24   # más viejas se desconectan
+    PRICE_HISTORY_BATCH_SIZE: int = 1000       # filas por INSERT durante el ingest
+    PRICE_HISTORY_MAX_DAYS: int = 730          # máximo de /api/products/{id}/history
+    
+    # Máximo de carritos por request en /api/cart/calculate-batch
+    CART_BATCH_MAX_CARTS: int = 500
+    
+    # Sesiones de carrito con totales incrementales (/api/cart/sessions)
+    CART_SESSION_MAX_ENTRIES: int = 10000
+    CART_SESSION_TTL_SECONDS: int = 3600
+    # Además de volver a preciar cuando cambia catalog_version, los precios
+    # de una sesión se vuelven a leer si tienen más de estos segundos
+    CART_SESSION_REPRICE_SECONDS: int = 300
+    
+    # Guardado diferido de carritos (/api/cart/save): se insertan por lotes
+    # cuando se juntan CART_SAVE_BATCH_SIZE o pasan CART_SAVE_FLUSH_SECONDS
+    CART_SAVE_BUFFER_ENABLED: bool = True
+    CART_SAVE_BATCH_SIZE: int = 100
+    CART_SAVE_FLUSH_SECONDS: float = 2.0
+    CART_SAVE_MAX_PENDING: int = 10000
+    # Intentos de un lote antes de escribirlo fila por fila (y descartar las inválidas)
+    CART_SAVE_MAX_ATTEMPTS: int = 3
+    
+    # Matriz de precios en memoria (NumPy) para calcular carritos sin consultas
+    PRICE_MATRIX_ENABLED: bool = False
+    
+    # Autocompletado en memoria (/api/products/suggest)
+    SUGGEST_ENABLED: bool = True
+    # Registrar las búsquedas de /search (search_queries, por lotes en segundo
+    # plano): de ahí sale la popularidad de las sugerencias
+    SEARCH_LOG_ENABLED: bool = True
+    # Cache de respuestas del catálogo (búsqueda, detalle y listado)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    # Cache-Control max-age (segundos) para tiendas, categorías y detalle
+    CATALOG_CACHE_MAX_AGE: int = 60
+    
+    # Cada cuánto la API lee la versión del catálogo (tabla catalog_version,
+    # la incrementan los ingest) para invalidar caches e índices
+    CATALOG_VERSION_POLL_SECONDS: float = 2.0
+    
+    # Reconstrucción periódica de índices en memoria (0 = solo al iniciar)
+    # Necesaria porque los scrapers corren como scripts en otro proceso
+    INDEX_REFRESH_SECONDS: int = 900
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,180 @@
+"""
+Métricas del pool de conexiones
+Cuánto espera cada request por una conexión y qué tan lleno está el pool,
+exportado en formato de texto de Prometheus (/metrics)
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Límites (segundos) del histograma de espera por conexión
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# QueuePool._do_get se llama a sí mismo en algunos casos (carrera por el
+# overflow): solo se mide la llamada externa. ContextVar funciona igual
+# con hilos y con greenlets/tareas del motor asíncrono
+_in_checkout: ContextVar[bool] = ContextVar("pool_in_checkout", default=False)
+
+
+class PoolMetrics:
+    """Histograma de espera, timeouts y requests esperando de un pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional[QueuePool] = None
+        self.bucket_counts = [0] * len(CHECKOUT_WAIT_BUCKETS)
+        self.wait_sum = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self._lock = threading.Lock()
+
+    def start_wait(self):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def end_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_sum += seconds
+            for i, bound in enumerate(CHECKOUT_WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        """Contadores y estado actual del pool"""
+        pool = self.pool
+        size = pool.size() if pool else 0
+        max_overflow = pool._max_overflow if pool else 0
+        in_use = pool.checkedout() if pool else 0
+        capacity = size + max(max_overflow, 0)
+        with self._lock:
+            return {
+                "size": size,
+                "max_overflow": max_overflow,
+                "in_use": in_use,
+                "idle": pool.checkedin() if pool else 0,
+                "saturation": round(in_use / capacity, 4) if capacity else 0.0,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_sum": self.wait_sum,
+                "bucket_counts": list(self.bucket_counts),
+            }
+
+
+_metrics: Dict[str, PoolMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def pool_metrics(name: str) -> PoolMetrics:
+    """Métricas del pool `name` (se conservan si el pool se recrea)"""
+    with _metrics_lock:
+        if name not in _metrics:
+            _metrics[name] = PoolMetrics(name)
+        return _metrics[name]
+
+
+class _InstrumentedPoolMixin:
+    """
+    Mide el tiempo de _do_get: espera en la cola más, si hace falta, abrir
+    una conexión nueva (overflow). El nombre del pool es el
+    `pool_logging_name` del motor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics = pool_metrics(self.logging_name or "default")
+        self._metrics.pool = self
+
+    def _do_get(self):
+        if _in_checkout.get():
+            return super()._do_get()
+
+        token = _in_checkout.set(True)
+        self._metrics.start_wait()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self._metrics.end_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        except BaseException:
+            self._metrics.end_wait(time.perf_counter() - start)
+            raise
+        else:
+            self._metrics.end_wait(time.perf_counter() - start)
+            return connection
+        finally:
+            _in_checkout.reset(token)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool con métricas (motor síncrono)"""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool con métricas (motor asíncrono)"""
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus() -> str:
+    """Todas las métricas de pools en formato de texto de Prometheus"""
+    with _metrics_lock:
+        pools = sorted(_metrics.items())
+
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+
+    snapshots = [(name, m.snapshot()) for name, m in pools]
+
+    gauges = [
+        ("db_pool_size", "Conexiones permanentes del pool", "size"),
+        ("db_pool_max_overflow", "Conexiones extra permitidas sobre el tamaño del pool", "max_overflow"),
+        ("db_pool_connections_in_use", "Conexiones entregadas en este momento", "in_use"),
+        ("db_pool_connections_idle", "Conexiones libres en el pool", "idle"),
+        ("db_pool_saturation", "Conexiones en uso / capacidad total (size + overflow)", "saturation"),
+        ("db_pool_waiting", "Requests esperando una conexión", "waiting"),
+        ("db_pool_max_waiting", "Máximo de requests esperando a la vez desde el inicio", "max_waiting"),
+    ]
+    for name, help_text, key in gauges:
+        metric(name, "gauge", help_text, [({"pool": pool}, snap[key]) for pool, snap in snapshots])
+
+    metric("db_pool_checkout_timeouts_total", "counter",
+           "Checkouts que fallaron por pool_timeout",
+           [({"pool": pool}, snap["timeouts"]) for pool, snap in snapshots])
+
+    histogram = "db_pool_checkout_wait_seconds"
+    lines.append(f"# HELP {histogram} Tiempo hasta obtener una conexión del pool")
+    lines.append(f"# TYPE {histogram} histogram")
+    for pool, snap in snapshots:
+        cumulative = 0
+        for bound, count in zip(CHECKOUT_WAIT_BUCKETS, snap["bucket_counts"]):
+            cumulative += count
+            lines.append(f'{histogram}_bucket{{pool="{pool}",le="{bound}"}} {cumulative}')
+        lines.append(f'{histogram}_bucket{{pool="{pool}",le="+Inf"}} {snap["checkouts"]}')
+        lines.append(f'{histogram}_sum{{pool="{pool}"}} {_format_value(snap["wait_sum"])}')
+        lines.append(f'{histogram}_count{{pool="{pool}"}} {snap["checkouts"]}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,178 @@
+"""
+Ruteo de lecturas a réplicas
+Las rutas asíncronas de solo lectura del catálogo (búsqueda, detalle,
+facetas, tiendas, categorías, cálculo y optimización de carritos) usan una
+réplica elegida por turno (round-robin); las escrituras siguen en la base
+principal.
+Una réplica con más de REPLICA_MAX_LAG_SECONDS de atraso (o que no
+responde, o que perdió la conexión con la principal) se saltea hasta la
+siguiente verificación; si ninguna sirve, se lee de la principal.
+El atraso se mide en una tarea de fondo, nunca durante una request.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.config import settings
+from app.database.session import AsyncSessionLocal, async_engine, create_api_engine
+
+# Atraso de replicación en segundos: 0 en la principal o si la réplica ya
+# aplicó todo lo recibido. NULL (no usar) si no está recibiendo WAL de la
+# principal: desconectada, recibido = aplicado aunque esté muy atrasada.
+# Leer pg_stat_wal_receiver.status requiere pg_read_all_stats; sin ese rol
+# la réplica nunca se considera al día y se lee de la principal
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    lag_seconds: Optional[float] = None
+    checked_at: float = 0.0
+    selected: int = 0
+    failed_checks: int = 0
+
+
+class ReplicaRouter:
+    """
+    Elige el motor para una request de solo lectura.
+    Una tarea de fondo (start) consulta el atraso de todas las réplicas cada
+    `check_seconds`; choose() solo lee el último valor, sin tomar
+    conexiones. Un valor sin actualizar en más de 3 intervalos (la tarea
+    se detuvo o la consulta quedó colgada) no se considera al día.
+    """
+
+    def __init__(self, replicas: List[Replica], primary: AsyncEngine,
+                 max_lag_seconds: float = 30.0, check_seconds: float = 5.0):
+        self.replicas = replicas
+        self.primary = primary
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self.primary_fallbacks = 0
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _measure_lag(self, replica: Replica) -> Optional[float]:
+        async with replica.engine.connect() as conn:
+            lag = (await conn.execute(_LAG_SQL)).scalar()
+        return float(lag) if lag is not None else None
+
+    async def _check(self, replica: Replica):
+        try:
+            replica.lag_seconds = await self._measure_lag(replica)
+        except Exception as e:
+            replica.lag_seconds = None
+            replica.failed_checks += 1
+            print(f"⚠️  Réplica '{replica.name}' no disponible: {e}")
+        replica.checked_at = time.monotonic()
+
+    async def refresh(self):
+        """Medir el atraso de todas las réplicas (en paralelo)"""
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        """Iniciar la verificación periódica en el event loop actual"""
+        if self.replicas and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _is_fresh(self, replica: Replica) -> bool:
+        if time.monotonic() - replica.checked_at > 3 * self.check_seconds:
+            return False
+        return replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds
+
+    def choose(self) -> AsyncEngine:
+        """Siguiente réplica al día (en turno) o la principal"""
+        count = len(self.replicas)
+        start = self._next
+        self._next = (start + 1) % count if count else 0
+
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if self._is_fresh(replica):
+                replica.selected += 1
+                return replica.engine
+
+        if count:
+            self.primary_fallbacks += 1
+        return self.primary
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "max_lag_seconds": self.max_lag_seconds,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "lag_seconds": replica.lag_seconds,
+                    "fresh": self._is_fresh(replica),
+                    "checked_seconds_ago": round(now - replica.checked_at, 1) if replica.checked_at else None,
+                    "selected": replica.selected,
+                    "failed_checks": replica.failed_checks,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    async def dispose(self):
+        await self.stop()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def _replica_urls() -> List[str]:
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+
+def _create_replicas() -> List[Replica]:
+    replicas = []
+    for i, url in enumerate(_replica_urls(), start=1):
+        # El nombre del pool (métricas) lleva el host, nunca la contraseña
+        name = f"replica-{i}-{make_url(url).host}"
+        replicas.append(Replica(name=name, engine=create_api_engine(url, name)))
+    return replicas
+
+
+replica_router = ReplicaRouter(
+    _create_replicas(),
+    async_engine,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.REPLICA_LAG_CHECK_SECONDS
+)
+
+
+async def get_async_read_db():
+    """
+    Sesión asíncrona para requests de SOLO LECTURA: réplica al día o, si no
+    hay ninguna, la base principal. Para escribir usar get_async_db.
+    Elegir el motor no consulta la BD: un acierto de cache no toma conexión.
+    """
+    engine = replica_router.choose()
+    async with AsyncSessionLocal(bind=engine) as db:
+        yield db
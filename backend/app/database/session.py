@@ -1,16 +1,43 @@
+import uuid
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.database.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+
+
+def _async_connect_args() -> dict:
+    """
+    Argumentos de conexión de asyncpg.
+    Con un pooler en modo transacción cada transacción puede caer en otra
+    conexión del servidor, así que no se pueden reutilizar prepared
+    statements: se desactivan ambos caches (asyncpg y SQLAlchemy) y los
+    que asyncpg igual crea reciben nombres únicos.
+    psycopg2 no usa prepared statements en el servidor; el motor síncrono
+    no necesita cambios.
+    """
+    connect_args = {"ssl": "require"}
+    if settings.DB_TRANSACTION_POOLER:
+        connect_args.update({
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4().hex}__",
+        })
+    return connect_args
+
 
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name="sync",
     pool_pre_ping=True,
 
-    pool_size=1,          
-    max_overflow=0,       
-    pool_timeout=30,      
-    pool_recycle=1800,    
+    pool_size=settings.DB_SYNC_POOL_SIZE,
+    max_overflow=settings.DB_SYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
 
     connect_args={"sslmode": "require"}
 )
@@ -24,9 +51,59 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+def _async_database_url(url: str):
+    """
+    Misma base de datos con el driver asyncpg.
+    asyncpg no entiende "sslmode" en la URL: el SSL va en connect_args
+    """
+    url = make_url(url)
+    return url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+
+
+def create_api_engine(url: str, pool_name: str):
+    """Motor asíncrono (asyncpg) con el pool instrumentado y la configuración de Settings"""
+    return create_async_engine(
+        _async_database_url(url),
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_logging_name=pool_name,
+        pool_pre_ping=True,
+
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+
+        connect_args=_async_connect_args()
+    )
+
+
+# Motor asíncrono para la API: cada request espera la BD sin ocupar un hilo,
+# así la concurrencia depende de las conexiones y no del threadpool.
+# El motor síncrono se mantiene para scrapers, scripts y tareas en hilos.
+async_engine = create_api_engine(settings.DATABASE_URL, "async")
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Sesión asíncrona por request.
+    Los servicios de la API consultan con `await db.execute(...)`; la
+    conexión se toma recién en la primera consulta (un acierto de cache no
+    ocupa conexión)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,7 +1,21 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api import products, cart, stores
+from app.services.index_holder import start_index_refresh, stop_index_refresh, rebuild_active_indexes
+from app.services.catalog_version import (
+    start_catalog_version_poll, stop_catalog_version_poll, on_catalog_change
+)
+from app.services.search_index import search_index
+from app.services.autocomplete import suggestion_index
+from app.services.price_matrix import price_matrix
+from app.services.response_cache import response_cache
+from app.services.cart_saves import cart_save_buffer
+from app.services.analytics_service import search_log_buffer
+from app.database.session import async_engine
+from app.database.pool_metrics import render_prometheus
+from app.database.replicas import replica_router
 
 app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
 
@@ -16,6 +30,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Registrar routers
@@ -27,10 +42,72 @@ app.include_router(stores.router, prefix="/api/stores", tags=["stores"])
 from app.api.categories import router as categories_router
 app.include_router(categories_router, prefix="/api/categories", tags=["categories"])
 
+@app.on_event("startup")
+def start_catalog_version():
+    """
+    Seguir la versión del catálogo que incrementan los ingest (otros
+    procesos). La primera lectura es inmediata, antes de construir los
+    índices; después, cada cambio los reconstruye
+    """
+    start_catalog_version_poll(settings.CATALOG_VERSION_POLL_SECONDS)
+    on_catalog_change(lambda generation: rebuild_active_indexes())
+
+@app.on_event("startup")
+def start_memory_indexes():
+    """Construir en segundo plano los índices en memoria habilitados"""
+    if settings.SEARCH_IN_MEMORY:
+        search_index.activate()
+    if settings.SUGGEST_ENABLED:
+        suggestion_index.activate()
+    if settings.PRICE_MATRIX_ENABLED:
+        price_matrix.activate()
+    start_index_refresh(settings.INDEX_REFRESH_SECONDS)
+
+@app.on_event("startup")
+async def start_replica_checks():
+    """Medir el atraso de las réplicas en segundo plano"""
+    replica_router.start()
+
+@app.on_event("shutdown")
+def stop_memory_indexes():
+    stop_index_refresh()
+    stop_catalog_version_poll()
+
+@app.on_event("shutdown")
+def drain_cart_saves():
+    """Escribir los carritos pendientes antes de terminar"""
+    cart_save_buffer.stop()
+
+@app.on_event("shutdown")
+def drain_search_log():
+    """Escribir las búsquedas registradas pendientes antes de terminar"""
+    search_log_buffer.stop()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Cerrar las conexiones del pool asíncrono"""
+    await async_engine.dispose()
+    await replica_router.dispose()
+
 @app.get("/")
 def root():
     return {"message": "AhorraQP API funcionando"}
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/health/cache")
+def cache_stats():
+    """Aciertos y fallos del cache de respuestas del catálogo"""
+    return response_cache.stats()
+
+@app.get("/health/replicas")
+def replica_stats():
+    """Atraso de cada réplica de lectura y cuántas veces se usó la principal"""
+    return replica_router.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas de los pools de conexiones (formato de texto de Prometheus)"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -7,5 +7,8 @@ from app.models.brand import Brand
 from app.models.category import Category
 from app.models.product import Product
 from app.models.store_price import StorePrice
+from app.models.price_history import PriceHistory
+from app.models.product_best_price import ProductBestPrice
+from app.models.catalog_version import CatalogVersion
 
-__all__ = ["Store", "Brand", "Category", "Product", "StorePrice"]
\ No newline at end of file
+__all__ = ["Store", "Brand", "Category", "Product", "StorePrice", "PriceHistory", "ProductBestPrice", "CatalogVersion"]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, SmallInteger, BigInteger, DateTime
+from datetime import datetime
+from app.database.session import Base
+
+
+class CatalogVersion(Base):
+    """
+    Versión del catálogo compartida entre procesos (una sola fila, id = 1).
+    Los ingest la incrementan después de confirmar cambios de productos o
+    precios; la API la consulta cada pocos segundos para invalidar sus
+    caches e índices en memoria (ver app/services/catalog_version.py)
+    """
+    __tablename__ = "catalog_version"
+    
+    id = Column(SmallInteger, primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<CatalogVersion(generation={self.generation}, updated_at={self.updated_at})>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, DateTime, DECIMAL, Boolean
+from datetime import datetime
+from app.database.session import Base
+
+
+class PriceHistory(Base):
+    """
+    Historial de precios (solo se agregan filas): una fila por cada cambio
+    de precio o disponibilidad de un producto en una tienda.
+    La tabla está particionada por mes (RANGE sobre recorded_at); las
+    particiones las crea y las desconecta scripts/manage_price_history.py.
+    Sin claves foráneas para que desconectar particiones viejas sea barato.
+    """
+    __tablename__ = "price_history"
+    
+    # La clave primaria debe incluir la columna de partición.
+    # (product_id, ...) sirve para "historial de un producto" en cada partición
+    product_id = Column(Integer, primary_key=True)
+    store_id = Column(Integer, primary_key=True)
+    recorded_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    price = Column(DECIMAL(10, 2), nullable=False)
+    is_available = Column(Boolean, nullable=False)
+    
+    __table_args__ = {"postgresql_partition_by": "RANGE (recorded_at)"}
+    
+    def __repr__(self):
+        return f"<PriceHistory(product_id={self.product_id}, store_id={self.store_id}, price={self.price}, recorded_at={self.recorded_at})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, Text, ForeignKey, Index, DECIMAL
 from sqlalchemy.orm import relationship
 from app.database.session import Base
 
@@ -11,6 +11,10 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
     image_url = Column(Text)
     
+    # Contenido extraído del nombre al guardar (ver helpers.parse_quantity)
+    unit_quantity = Column(DECIMAL(10, 3))  # Cantidad total en la unidad normalizada
+    unit = Column(Text)                     # 'kg', 'l' o 'un'
+    
     # Referencias
     brand = relationship("Brand")
     category = relationship("Category")
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, DECIMAL, Text
+from sqlalchemy.ext.declarative import declarative_base
+
+# Las vistas usan su propio Base: Base.metadata.create_all (init_db) no debe
+# crearlas como tablas. La vista la crea scripts/add_best_prices.py
+ViewBase = declarative_base()
+
+
+class ProductBestPrice(ViewBase):
+    """
+    Vista materializada product_best_prices: mejor precio disponible por
+    producto. Se refresca (CONCURRENTLY) al terminar cada ingest; los
+    productos sin precios disponibles no aparecen.
+    """
+    __tablename__ = "product_best_prices"
+    
+    product_id = Column(Integer, primary_key=True)  # Índice único (requerido por CONCURRENTLY)
+    min_price = Column(DECIMAL(10, 2))
+    max_price = Column(DECIMAL(10, 2))
+    price_spread = Column(DECIMAL(10, 2))           # max_price - min_price
+    store_count = Column(Integer)                   # Tiendas con precio disponible
+    cheapest_store_id = Column(Integer)             # Empate: menor store_id
+    min_unit_price = Column(DECIMAL(12, 2))         # Menor precio por kg / l / unidad (None si no se conoce)
+    unit = Column(Text)                             # products.unit ('kg', 'l' o 'un')
+    
+    def __repr__(self):
+        return f"<ProductBestPrice(product_id={self.product_id}, min_price={self.min_price}, store_count={self.store_count})>"
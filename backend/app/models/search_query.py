@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, Text, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from app.database.session import Base
@@ -11,12 +11,22 @@ class SearchQuery(Base):
     - type: 'search' o 'cart'
     - Para búsquedas: {type: 'search', query: str, results_count: int, filters: {}}
     - Para carritos: {type: 'cart', items: [...], totals: [...], store_prices: {...}}
+    Los carritos se guardan una sola vez por contenido (content_hash);
+    guardarlos de nuevo incrementa seen_count y actualiza last_seen_at
     """
     __tablename__ = "search_queries"
     
     id = Column(Integer, primary_key=True, index=True)
     query_data = Column(JSONB, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    content_hash = Column(Text)                        # sha256 del carrito canónico (None en búsquedas)
+    seen_count = Column(Integer, default=1, nullable=False)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Destino de INSERT ... ON CONFLICT (content_hash); NULL no colisiona
+        Index('idx_search_queries_content_hash', 'content_hash', unique=True),
+    )
     
     def __repr__(self):
         return f"<SearchQuery(id={self.id}, type={self.query_data.get('type')}, created_at={self.created_at})>"
\ No newline at end of file
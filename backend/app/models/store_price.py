@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, DECIMAL, Boolean, Index
+from sqlalchemy import Column, Integer, Text, ForeignKey, DECIMAL, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from app.database.session import Base
 
@@ -11,6 +11,7 @@ class StorePrice(Base):
     price = Column(DECIMAL(10, 2), nullable=False)
     url = Column(Text)
     is_available = Column(Boolean, default=True)
+    unit_price = Column(DECIMAL(12, 2))  # Precio por kg / l / unidad (None si no se conoce)
     
     # Referencias
     product = relationship("Product", back_populates="prices")
@@ -20,4 +21,7 @@ class StorePrice(Base):
     # y acelerar búsquedas
     __table_args__ = (
         Index('idx_product_store', 'product_id', 'store_id', unique=True),
+        # Menor precio unitario disponible por producto (orden por precio unitario)
+        Index('idx_store_prices_unit_price', 'product_id', 'unit_price',
+              postgresql_where=text('is_available')),
     )
\ No newline at end of file
@@ -1,11 +1,11 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Dict, Any, Literal, Optional
 from decimal import Decimal
 
 class CartItem(BaseModel):
     product_id: int
     quantity: int = 1
-    store_id: int = None  # Tienda seleccionada (opcional)
+    store_id: Optional[int] = None  # Tienda seleccionada (opcional)
 
 class CartRequest(BaseModel):
     items: List[CartItem]
@@ -17,9 +17,63 @@ class StoreTotalResponse(BaseModel):
     items_available: int
     items_unavailable: int
 
+class SelectionTotalResponse(BaseModel):
+    total: Decimal          # Items con tienda elegida, cada uno en su tienda
+    items_available: int
+    items_unavailable: int  # Elegidos en una tienda que no los tiene disponibles
+    items_unpinned: int     # Items sin tienda elegida (no suman aquí)
+
 class CartTotalsResponse(BaseModel):
     totals: List[StoreTotalResponse]
+    selection: Optional[SelectionTotalResponse] = None  # Solo si algún item tiene store_id
+
+class CartDelta(BaseModel):
+    op: Literal["add", "remove", "set"]  # add suma `quantity`, set la reemplaza
+    product_id: int
+    quantity: int = 1
+    store_id: Optional[int] = None  # Línea con tienda elegida (None = línea libre)
+
+class CartDeltaRequest(BaseModel):
+    deltas: List[CartDelta]
+
+class CartSessionResponse(CartTotalsResponse):
+    session_id: str
+    items: List[CartItem]  # Una línea por (producto, tienda elegida), en orden de llegada
+
+class CartOptimizeRequest(BaseModel):
+    items: List[CartItem]
+    max_stores: int = Field(2, ge=1)     # Máximo de tiendas a visitar
+    # Costo fijo por tienda visitada (movilidad, delivery) y por tienda
+    # (store_costs reemplaza a store_cost). No negativos: la cota inferior
+    # del branch-and-bound asume que agregar una tienda nunca baja el total
+    store_cost: Decimal = Field(Decimal(0), ge=0)
+    store_costs: Dict[int, Annotated[Decimal, Field(ge=0)]] = {}
+    mode: Literal["auto", "exact", "greedy"] = "auto"
+
+class OptimizedItemResponse(BaseModel):
+    product_id: int
+    quantity: int
+    store_id: int
+    store_name: str
+    unit_price: Decimal
+    subtotal: Decimal
+
+class StorePlanResponse(BaseModel):
+    store_id: int
+    store_name: str
+    items_count: int
+    subtotal: Decimal
+    fixed_cost: Decimal
+
+class CartOptimizeResponse(BaseModel):
+    total: Decimal              # Productos + costos fijos
+    items_total: Decimal
+    fixed_costs_total: Decimal
+    stores: List[StorePlanResponse]
+    items: List[OptimizedItemResponse]
+    unavailable_product_ids: List[int]
+    method: str                 # "exact" o "greedy"
 
 class SaveCartRequest(BaseModel):
     items: List[dict]  # Lista completa de items con detalles
-    totals: dict  # Totales calculados por tienda
\ No newline at end of file
+    totals: dict  # Totales calculados por tienda
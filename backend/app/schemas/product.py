@@ -1,11 +1,13 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from decimal import Decimal
+from datetime import datetime
 
 class PriceInfo(BaseModel):
     store_id: int
     store_name: str
     price: Decimal
+    unit_price: Optional[Decimal] = None  # Precio por kg / l / unidad
     url: Optional[str]
     is_available: bool
     
@@ -18,11 +20,64 @@ class ProductResponse(BaseModel):
     brand_name: str
     category_name: str
     image_url: Optional[str]
+    unit_quantity: Optional[Decimal] = None  # Contenido total en `unit`
+    unit: Optional[str] = None               # 'kg', 'l' o 'un'
     prices: List[PriceInfo]
+    score: Optional[float] = None  # Relevancia BM25 (solo en búsquedas por texto)
     
     class Config:
         from_attributes = True
 
+# Orden de /search: relevancia (BM25), menor precio por kg / l / unidad
+# o menor precio disponible
+SearchSort = Literal["relevance", "unit_price", "price"]
+
+class ProductPageResponse(BaseModel):
+    items: List[ProductResponse]
+    next_cursor: Optional[str]  # None cuando no hay más páginas
+
+class FacetCount(BaseModel):
+    id: int
+    name: str
+    count: int  # Productos que coinciden con la búsqueda
+
+class SearchFacetsResponse(BaseModel):
+    categories: List[FacetCount]
+    brands: List[FacetCount]
+    stores: List[FacetCount]  # Productos disponibles en cada tienda
+
+class SearchResultsResponse(BaseModel):
+    """/search con include_facets=true: resultados y facetas en una respuesta"""
+    items: List[ProductResponse]
+    facets: SearchFacetsResponse
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int]
+
+class ProductBatchResponse(BaseModel):
+    products: List[ProductResponse]  # En el mismo orden de los IDs pedidos
+    missing_ids: List[int]           # IDs que no existen
+
+class SuggestionResponse(BaseModel):
+    text: str
+    kind: str  # "product" o "brand"
+
+class PricePoint(BaseModel):
+    recorded_at: datetime
+    price: Decimal
+    is_available: bool
+
+class StorePriceHistory(BaseModel):
+    store_id: int
+    store_name: str
+    points: List[PricePoint]  # Cronológico; el primero puede ser anterior a `since`
+
+class PriceHistoryResponse(BaseModel):
+    product_id: int
+    days: int
+    since: datetime
+    stores: List[StorePriceHistory]
+
 class ProductSearch(BaseModel):
     query: str
     category_id: Optional[int] = None
\ No newline at end of file
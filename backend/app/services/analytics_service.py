@@ -1,7 +1,18 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.search_query import SearchQuery
+from app.services.write_buffer import WriteBehindBuffer
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+
+def _insert_searches(db: Session, rows: List[dict]):
+    """Un INSERT de varias filas por lote de búsquedas registradas"""
+    db.execute(insert(SearchQuery), rows)
+
+
+# Las búsquedas se registran en segundo plano: /search no espera el INSERT
+search_log_buffer = WriteBehindBuffer("search-log", _insert_searches)
 
 
 class AnalyticsService:
@@ -15,7 +26,9 @@ class AnalyticsService:
     
     def log_search(self, query: str, results_count: int, filters: Dict[str, Any] = None):
         """
-        Registrar una búsqueda realizada
+        Registrar una búsqueda realizada (la popularidad del autocompletado
+        sale de estos registros). Se encola en search_log_buffer y se
+        escribe por lotes; si la cola está llena, la búsqueda no se registra
         
         Args:
             query: Término de búsqueda
@@ -29,9 +42,7 @@ class AnalyticsService:
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        search_record = SearchQuery(query_data=query_data)
-        self.db.add(search_record)
-        self.db.commit()
+        search_log_buffer.add({"query_data": query_data, "created_at": datetime.utcnow()})
     
     def log_cart_calculation(self, items_count: int, stores_compared: int):
         """
@@ -0,0 +1,128 @@
+"""
+Autocompletado de nombres de productos y marcas
+Arreglo ordenado de claves normalizadas + búsqueda binaria, sin consultar la BD
+"""
+
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Product, Brand
+from app.models.search_query import SearchQuery
+from app.services.index_holder import IndexHolder
+from app.utils.helpers import fold_search_text
+
+# Máximo de sugerencias por consulta (tope de `limit` en /suggest)
+MAX_SUGGESTIONS = 20
+
+# Los prefijos de hasta esta longitud coinciden con muchas claves: su top
+# se precalcula al construir el índice. Los más largos recorren todas sus
+# coincidencias (pocas) antes de ordenar por popularidad
+SHORT_PREFIX_LENGTH = 3
+
+# Búsquedas registradas que se consideran para la popularidad
+POPULARITY_WINDOW = 50000
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: str      # "product" o "brand"
+    weight: float
+
+
+class SuggestionIndex:
+    """
+    Índice inmutable de sugerencias.
+    Cada nombre se indexa por su texto completo y por cada sufijo de palabra
+    ("arroz faraon extra" también responde a "faraon" y "extra"), de modo que
+    cualquier palabra del nombre sirve como prefijo.
+    """
+
+    def __init__(self, suggestions: List[Suggestion]):
+        self.suggestions = suggestions
+        entries: List[Tuple[str, int]] = []
+        for position, suggestion in enumerate(suggestions):
+            words = fold_search_text(suggestion.text).split()
+            for i in range(len(words)):
+                entries.append((' '.join(words[i:]), position))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._positions = [position for _, position in entries]
+
+        # Top MAX_SUGGESTIONS de cada prefijo corto, ya ordenado
+        short: Dict[str, set] = defaultdict(set)
+        for key, position in entries:
+            for length in range(1, min(SHORT_PREFIX_LENGTH, len(key)) + 1):
+                short[key[:length]].add(position)
+        self._short_top = {
+            prefix: heapq.nsmallest(MAX_SUGGESTIONS, positions, key=self._rank)
+            for prefix, positions in short.items()
+        }
+
+    def _rank(self, position: int) -> tuple:
+        """Más populares primero; a igual peso, los más cortos"""
+        suggestion = self.suggestions[position]
+        return (-suggestion.weight, len(suggestion.text), suggestion.text, position)
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """
+        Sugerencias cuyo texto (o alguna de sus palabras) empieza con `prefix`,
+        las `limit` más populares (como máximo MAX_SUGGESTIONS)
+        """
+        prefix = fold_search_text(prefix)
+        limit = min(limit, MAX_SUGGESTIONS)
+        if not prefix:
+            return []
+
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            return [self.suggestions[position] for position in self._short_top.get(prefix, [])[:limit]]
+
+        seen = set()
+        for i in range(bisect_left(self._keys, prefix), len(self._keys)):
+            if not self._keys[i].startswith(prefix):
+                break
+            seen.add(self._positions[i])
+
+        return [self.suggestions[position] for position in heapq.nsmallest(limit, seen, key=self._rank)]
+
+
+def _search_popularity(db: Session) -> Dict[str, int]:
+    """Veces que aparece cada palabra en los términos buscados (search_queries)"""
+    recent = db.query(SearchQuery.query_data['query'].astext.label('query')).filter(
+        SearchQuery.query_data.has_key('query')
+    ).order_by(SearchQuery.id.desc()).limit(POPULARITY_WINDOW).subquery()
+
+    rows = db.query(recent.c.query, func.count()).group_by(recent.c.query)
+
+    popularity: Dict[str, int] = defaultdict(int)
+    for query, count in rows:
+        for word in set(fold_search_text(query).split()):
+            popularity[word] += count
+    return popularity
+
+
+def build_suggestion_index(db: Session) -> SuggestionIndex:
+    """
+    Construir el índice desde productos, marcas y búsquedas registradas.
+    El peso de cada nombre es 1 + la popularidad de sus palabras.
+    """
+    popularity = _search_popularity(db)
+
+    def weight(text: str) -> float:
+        return 1.0 + sum(popularity.get(word, 0) for word in set(fold_search_text(text).split()))
+
+    suggestions = []
+    for (name,) in db.query(Brand.name).distinct():
+        suggestions.append(Suggestion(name, "brand", weight(name)))
+    for (name,) in db.query(Product.name).distinct():
+        suggestions.append(Suggestion(name, "product", weight(name)))
+
+    return SuggestionIndex(suggestions)
+
+
+suggestion_index: IndexHolder[SuggestionIndex] = IndexHolder("suggest", build_suggestion_index)
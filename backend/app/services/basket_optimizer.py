@@ -0,0 +1,211 @@
+"""
+Optimizador de compra dividida entre tiendas
+Elige en qué tienda comprar cada producto para minimizar el total,
+visitando como máximo N tiendas y con un costo fijo opcional por tienda.
+Todos los montos están en céntimos enteros.
+"""
+
+from math import comb
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from app.schemas.cart import CartItem
+from app.services.cart_pricing import PriceMap
+
+# Subconjuntos de tiendas a partir de los cuales "auto" usa el modo greedy
+EXACT_SUBSET_LIMIT = 20000
+
+
+class BasketPlan(NamedTuple):
+    store_ids: List[int]                   # Tiendas a visitar
+    assignments: List[Tuple[int, int]]     # (índice del item, store_id)
+    unavailable: List[int]                 # Índices de items sin tienda
+    items_total: int                       # Céntimos
+    fixed_total: int                       # Céntimos
+    method: str                            # "exact" o "greedy"
+
+
+class _Problem:
+    """Costos por línea (item) y tienda; None si la tienda no lo tiene disponible"""
+
+    def __init__(self, store_ids: List[int], items: List[CartItem], prices: PriceMap,
+                 fixed_costs: Dict[int, int]):
+        self.store_ids = store_ids
+        self.fixed = [fixed_costs.get(store_id, 0) for store_id in store_ids]
+        self.costs: List[List[Optional[int]]] = []
+        for item in items:
+            store_prices = prices.get(item.product_id, {})
+            row = []
+            for store_id in store_ids:
+                info = store_prices.get(store_id)
+                row.append(info[0] * item.quantity if info and info[1] else None)
+            self.costs.append(row)
+
+    def evaluate(self, chosen: Sequence[int]) -> Tuple[int, int]:
+        """(líneas sin cubrir, costo total) de comprar solo en `chosen`"""
+        uncovered = 0
+        total = sum(self.fixed[s] for s in chosen)
+        for row in self.costs:
+            best = None
+            for s in chosen:
+                cost = row[s]
+                if cost is not None and (best is None or cost < best):
+                    best = cost
+            if best is None:
+                uncovered += 1
+            else:
+                total += best
+        return uncovered, total
+
+
+def _key(value: Tuple[int, int], chosen: Sequence[int]):
+    """Orden de preferencia: más líneas cubiertas, menor costo, menos tiendas"""
+    return value[0], value[1], len(chosen)
+
+
+def _solve_exact(problem: _Problem, max_stores: int) -> List[int]:
+    """
+    Branch and bound sobre subconjuntos de tiendas.
+    Cota inferior de un nodo: cada línea al mejor precio entre las tiendas
+    elegidas y las que aún pueden agregarse, más los costos fijos ya elegidos.
+    """
+    n = len(problem.store_ids)
+
+    # Tiendas que cubren más líneas (y más barato) primero: mejores soluciones antes
+    def standalone(s: int):
+        return _key(problem.evaluate([s]), [s])
+    order = sorted(range(n), key=standalone)
+
+    # suffix_min[i][line]: menor costo de la línea entre order[i:]
+    suffix_min: List[List[Optional[int]]] = [[None] * len(problem.costs) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        s = order[i]
+        for line, row in enumerate(problem.costs):
+            a, b = suffix_min[i + 1][line], row[s]
+            suffix_min[i][line] = b if a is None else (a if b is None or a <= b else b)
+
+    best_chosen: List[int] = []
+    best_key = _key(problem.evaluate([]), [])
+
+    def search(i: int, chosen: List[int], line_best: List[Optional[int]], fixed: int):
+        nonlocal best_chosen, best_key
+
+        # Cota inferior alcanzable desde este nodo
+        uncovered_lb = 0
+        cost_lb = fixed
+        for line, current in enumerate(line_best):
+            rest = suffix_min[i][line] if len(chosen) < max_stores else None
+            candidate = current if rest is None else (rest if current is None or rest < current else current)
+            if candidate is None:
+                uncovered_lb += 1
+            else:
+                cost_lb += candidate
+        if (uncovered_lb, cost_lb) >= best_key[:2] and chosen:
+            return
+
+        if chosen:
+            value = (sum(1 for c in line_best if c is None),
+                     fixed + sum(c for c in line_best if c is not None))
+            key = _key(value, chosen)
+            if key < best_key:
+                best_key, best_chosen = key, list(chosen)
+
+        if i == n or len(chosen) == max_stores:
+            return
+
+        s = order[i]
+        # Rama 1: incluir la tienda
+        new_best = [
+            cost if current is None or (cost is not None and cost < current) else current
+            for current, cost in zip(line_best, (row[s] for row in problem.costs))
+        ]
+        chosen.append(s)
+        search(i + 1, chosen, new_best, fixed + problem.fixed[s])
+        chosen.pop()
+        # Rama 2: excluirla
+        search(i + 1, chosen, line_best, fixed)
+
+    search(0, [], [None] * len(problem.costs), 0)
+    return best_chosen
+
+
+def _solve_greedy(problem: _Problem, max_stores: int) -> List[int]:
+    """
+    Agregar la tienda que más mejora el plan hasta llegar al máximo,
+    luego intentar intercambios 1 a 1 mientras mejoren
+    """
+    n = len(problem.store_ids)
+    chosen: List[int] = []
+    best_key = _key(problem.evaluate(chosen), chosen)
+
+    while len(chosen) < max_stores:
+        candidates = [
+            (_key(problem.evaluate(chosen + [s]), chosen + [s]), s)
+            for s in range(n) if s not in chosen
+        ]
+        if not candidates:
+            break
+        key, s = min(candidates)
+        if key >= best_key:
+            break
+        chosen.append(s)
+        best_key = key
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(chosen)):
+            for s in range(n):
+                if s in chosen:
+                    continue
+                trial = chosen[:i] + [s] + chosen[i + 1:]
+                key = _key(problem.evaluate(trial), trial)
+                if key < best_key:
+                    chosen, best_key, improved = trial, key, True
+
+    return chosen
+
+
+def optimize_basket(stores: List[Tuple[int, str]], items: List[CartItem], prices: PriceMap,
+                    max_stores: int, fixed_costs: Dict[int, int],
+                    mode: str = "auto") -> BasketPlan:
+    """
+    Plan de compra más barato visitando como máximo `max_stores` tiendas.
+    mode: "exact" (branch and bound), "greedy" o "auto" (exacto si el número
+    de subconjuntos posibles es pequeño).
+    """
+    store_ids = [store_id for store_id, _ in stores]
+    problem = _Problem(store_ids, items, prices, fixed_costs)
+    max_stores = max(1, min(max_stores, len(store_ids)))
+
+    if mode == "auto":
+        subsets = sum(comb(len(store_ids), k) for k in range(1, max_stores + 1))
+        mode = "exact" if subsets <= EXACT_SUBSET_LIMIT else "greedy"
+
+    chosen = _solve_exact(problem, max_stores) if mode == "exact" else _solve_greedy(problem, max_stores)
+
+    # Asignar cada línea a la tienda elegida más barata
+    assignments: List[Tuple[int, int]] = []
+    unavailable: List[int] = []
+    items_total = 0
+    used = set()
+    for line, row in enumerate(problem.costs):
+        options = [(row[s], s) for s in chosen if row[s] is not None]
+        if not options:
+            unavailable.append(line)
+            continue
+        cost, s = min(options)
+        assignments.append((line, store_ids[s]))
+        items_total += cost
+        used.add(s)
+
+    # Una tienda sin productos asignados no se visita (ni se paga su costo fijo)
+    visited = [s for s in chosen if s in used]
+    fixed_total = sum(problem.fixed[s] for s in visited)
+
+    return BasketPlan(
+        store_ids=[store_ids[s] for s in visited],
+        assignments=assignments,
+        unavailable=unavailable,
+        items_total=items_total,
+        fixed_total=fixed_total,
+        method=mode
+    )
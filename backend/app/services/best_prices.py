@@ -0,0 +1,30 @@
+"""
+Vista materializada product_best_prices (mejor precio por producto)
+Se refresca al final de cada ingest para que la búsqueda ordene por el
+precio más bajo sin agregar store_prices en cada consulta
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.services.catalog_version import bump_catalog_generation
+
+
+def refresh_best_prices(db: Session) -> bool:
+    """
+    REFRESH MATERIALIZED VIEW CONCURRENTLY: las búsquedas siguen leyendo la
+    versión anterior mientras se recalcula (usa el índice único por
+    product_id). Retorna False si la vista no existe o falla el refresco.
+    """
+    try:
+        db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY product_best_prices"))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  No se pudo refrescar product_best_prices: {e}")
+        print("   Ejecutar scripts/add_best_prices.py")
+        return False
+    
+    # Los resultados ordenados por precio cambian recién ahora
+    bump_catalog_generation(db)
+    print("✓ Mejores precios por producto actualizados")
+    return True
@@ -0,0 +1,129 @@
+"""
+Cálculo de totales de carrito por tienda
+Los precios se traen en UNA consulta (product_id IN ...) y el total se arma
+en memoria; así el costo no crece con tiendas x productos.
+Los items con store_id quedan fijos en su tienda: su subtotal se calcula una
+vez y solo los items libres se comparan entre tiendas.
+Los montos se manejan en céntimos enteros; se convierten a Decimal solo al
+armar la respuesta.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models import StorePrice
+from app.models.store import Store
+from app.schemas.cart import (
+    CartItem, CartTotalsResponse, StoreTotalResponse, SelectionTotalResponse
+)
+from app.utils.money import to_cents, cents_to_decimal
+
+# product_id -> store_id -> (precio en céntimos, disponible)
+PriceMap = Dict[int, Dict[int, Tuple[int, bool]]]
+
+
+def _stores_select():
+    return select(Store.id, Store.name).order_by(Store.id)
+
+
+def _prices_select(product_ids: set):
+    return select(
+        StorePrice.product_id, StorePrice.store_id, StorePrice.price, StorePrice.is_available
+    ).where(StorePrice.product_id.in_(product_ids))
+
+
+def _price_map(rows) -> PriceMap:
+    prices: PriceMap = {}
+    for product_id, store_id, price, is_available in rows:
+        prices.setdefault(product_id, {})[store_id] = (to_cents(price), is_available)
+    return prices
+
+
+def fetch_stores(db: Session) -> List[Tuple[int, str]]:
+    """Tiendas como (id, nombre), en orden estable"""
+    return [(store_id, name) for store_id, name in db.execute(_stores_select())]
+
+
+def fetch_price_map(db: Session, product_ids: Iterable[int]) -> PriceMap:
+    """Precios de todos los productos pedidos en todas las tiendas (1 consulta)"""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    return _price_map(db.execute(_prices_select(product_ids)))
+
+
+async def fetch_stores_async(db: AsyncSession) -> List[Tuple[int, str]]:
+    """fetch_stores con la sesión asíncrona de la API"""
+    return [(store_id, name) for store_id, name in await db.execute(_stores_select())]
+
+
+async def fetch_price_map_async(db: AsyncSession, product_ids: Iterable[int]) -> PriceMap:
+    """fetch_price_map con la sesión asíncrona de la API"""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    return _price_map(await db.execute(_prices_select(product_ids)))
+
+
+def total_decimal(cents: int, available: int) -> Decimal:
+    """
+    Total para la respuesta: idéntico a sumar los precios en Decimal
+    (Decimal(0) si no hubo productos disponibles, 2 decimales si los hubo)
+    """
+    return cents_to_decimal(cents) if available else Decimal(0)
+
+
+def compute_cart_totals(stores: List[Tuple[int, str]], items: List[CartItem],
+                        prices: PriceMap) -> CartTotalsResponse:
+    """
+    Total del carrito en cada tienda, ordenado de menor a mayor.
+    Un producto cuenta como no disponible si la tienda no lo vende o
+    lo tiene marcado como no disponible.
+    Los items con store_id se cobran siempre en su tienda (subtotal fijo que
+    se suma a todas) y forman el total de la selección actual.
+    """
+    pinned = [item for item in items if item.store_id is not None]
+    free = [item for item in items if item.store_id is None]
+
+    pinned_total = 0
+    pinned_available = 0
+    for item in pinned:
+        price_info = prices.get(item.product_id, {}).get(item.store_id)
+        if price_info and price_info[1]:
+            pinned_total += price_info[0] * item.quantity
+            pinned_available += 1
+
+    selection = None
+    if pinned:
+        selection = SelectionTotalResponse(
+            total=total_decimal(pinned_total, pinned_available),
+            items_available=pinned_available,
+            items_unavailable=len(pinned) - pinned_available,
+            items_unpinned=len(free)
+        )
+
+    # Acumular por item solo en las tiendas que lo venden
+    store_cents = {store_id: pinned_total for store_id, _ in stores}
+    store_available = {store_id: pinned_available for store_id, _ in stores}
+    for item in free:
+        for store_id, (cents, is_available) in prices.get(item.product_id, {}).items():
+            if is_available and store_id in store_cents:
+                store_cents[store_id] += cents * item.quantity
+                store_available[store_id] += 1
+
+    totals = []
+
+    for store_id, store_name in stores:
+        available = store_available[store_id]
+        totals.append(StoreTotalResponse(
+            store_id=store_id,
+            store_name=store_name,
+            total=total_decimal(store_cents[store_id], available),
+            items_available=available,
+            items_unavailable=len(items) - available
+        ))
+
+    totals.sort(key=lambda x: x.total)
+    return CartTotalsResponse(totals=totals, selection=selection)
@@ -0,0 +1,127 @@
+"""
+Guardado de carritos (/api/cart/save) con escritura diferida
+El request responde sin esperar a la base de datos; los carritos se
+insertan en search_queries con INSERT de varias filas.
+Cada carrito se identifica por el hash de su contenido canónico: el mismo
+carrito (aunque cambie el orden de los items) se guarda una sola vez y
+solo se incrementa su contador.
+"""
+
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.search_query import SearchQuery
+from app.schemas.cart import SaveCartRequest
+from app.services.write_buffer import WriteBehindBuffer
+
+
+def _canonical_json(data) -> str:
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def canonical_cart(cart: SaveCartRequest) -> Tuple[dict, str]:
+    """
+    Contenido canónico del carrito y su hash (sha256).
+    Los items se ordenan por su propio contenido, así que el orden en que
+    se agregaron no cambia el hash.
+    """
+    content = {
+        "items": sorted(cart.items, key=_canonical_json),
+        "totals": cart.totals
+    }
+    digest = hashlib.sha256(_canonical_json(content).encode()).hexdigest()
+    return content, digest
+
+
+def build_cart_record(cart: SaveCartRequest, now: datetime) -> dict:
+    """Fila de search_queries para un carrito guardado"""
+    content, content_hash = canonical_cart(cart)
+    return {
+        "query_data": {
+            "type": "cart",
+            "items": content["items"],
+            "totals": content["totals"],
+            "timestamp": now.isoformat()
+        },
+        "created_at": now,
+        "content_hash": content_hash,
+        "seen_count": 1,
+        "last_seen_at": now
+    }
+
+
+def _aggregate(rows: List[dict]) -> List[dict]:
+    """
+    Una fila por hash dentro del lote (ON CONFLICT no puede actualizar la
+    misma fila dos veces en una sentencia): se suman los contadores y se
+    conserva la primera y la última vez que se vio
+    """
+    merged: Dict[str, dict] = {}
+    for row in rows:
+        current = merged.get(row["content_hash"])
+        if current is None:
+            merged[row["content_hash"]] = dict(row)
+            continue
+        current["seen_count"] += row["seen_count"]
+        current["created_at"] = min(current["created_at"], row["created_at"])
+        current["last_seen_at"] = max(current["last_seen_at"], row["last_seen_at"])
+    return list(merged.values())
+
+
+def _upsert_carts(rows: List[dict]):
+    """
+    Un solo INSERT ... VALUES (...), (...) ON CONFLICT (content_hash) por lote;
+    los carritos ya guardados solo actualizan seen_count y last_seen_at
+    """
+    stmt = insert(SearchQuery).values(_aggregate(rows))
+    return stmt.on_conflict_do_update(
+        index_elements=[SearchQuery.content_hash],
+        set_={
+            "seen_count": SearchQuery.seen_count + stmt.excluded.seen_count,
+            "last_seen_at": func.greatest(SearchQuery.last_seen_at, stmt.excluded.last_seen_at)
+        }
+    )
+
+
+def _insert_carts(db: Session, rows: List[dict]):
+    """Escribir un lote de cart_save_buffer (sesión síncrona de su hilo)"""
+    db.execute(_upsert_carts(rows))
+
+
+cart_save_buffer = WriteBehindBuffer(
+    "cart-save",
+    _insert_carts,
+    batch_size=settings.CART_SAVE_BATCH_SIZE,
+    flush_seconds=settings.CART_SAVE_FLUSH_SECONDS,
+    max_pending=settings.CART_SAVE_MAX_PENDING,
+    max_attempts=settings.CART_SAVE_MAX_ATTEMPTS
+)
+
+
+async def save_cart(db: AsyncSession, cart: SaveCartRequest) -> dict:
+    """
+    Aceptar un carrito para guardar.
+    El ID es content_hash, la clave única de la fila guardada: se conoce
+    antes del INSERT (no hace falta esperarlo para responder) y guardar
+    de nuevo el mismo carrito retorna el mismo ID. Si el buffer está
+    deshabilitado o lleno, se inserta de inmediato con la sesión del request.
+    """
+    now = datetime.utcnow()
+    record = build_cart_record(cart, now)
+
+    if not settings.CART_SAVE_BUFFER_ENABLED or not cart_save_buffer.add(record):
+        await db.execute(_upsert_carts([record]))
+        await db.commit()
+
+    return {
+        "id": record["content_hash"],
+        "content_hash": record["content_hash"],
+        "message": "Carrito guardado exitosamente",
+        "created_at": now
+    }
@@ -0,0 +1,252 @@
+"""
+Sesiones de carrito con totales incrementales
+El servidor guarda el carrito y el total acumulado por tienda; el cliente
+solo envía cambios (agregar, quitar o cambiar cantidad) y cada cambio
+actualiza los totales en O(tiendas)
+"""
+
+import time
+import uuid
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.schemas.cart import (
+    CartItem, CartDelta, CartSessionResponse, StoreTotalResponse, SelectionTotalResponse
+)
+from app.services.cart_pricing import PriceMap, fetch_stores_async, fetch_price_map_async, total_decimal
+from app.services.catalog_version import catalog_generation
+from app.services.response_cache import ResponseCache
+
+# Las sesiones no se descartan al cambiar el catálogo: se vuelven a preciar.
+# Por eso se guardan siempre con la misma generación
+_SESSION_GENERATION = 0
+
+# Línea del carrito: (product_id, store_id elegido o None)
+LineKey = Tuple[int, Optional[int]]
+
+
+class CartSession:
+    """
+    Carrito con una línea por (producto, tienda elegida) y totales
+    acumulados con la misma regla que compute_cart_totals:
+    - líneas con tienda elegida (store_id): un subtotal fijo [céntimos,
+      disponibles, líneas] que se suma a todas las tiendas y forma la
+      selección
+    - líneas libres (store_id None): por tienda, [céntimos, disponibles]
+    Los totales son siempre iguales a compute_cart_totals sobre items()
+    con los mismos precios. `priced_at` es cuándo se leyeron los precios
+    de todas las líneas (al crearla o al volver a preciar).
+    """
+
+    def __init__(self, session_id: str, stores: List[Tuple[int, str]], generation: int):
+        self.session_id = session_id
+        self.stores = stores
+        self.generation = generation
+        self.priced_at = time.monotonic()
+        # (product_id, store_id) -> cantidad, en orden de llegada
+        self.lines: Dict[LineKey, int] = {}
+        self.prices: PriceMap = {}
+        self.lock = threading.Lock()
+        self._reset_totals()
+
+    def _reset_totals(self):
+        self._pinned = [0, 0, 0]
+        self._free: Dict[int, List[int]] = {store_id: [0, 0] for store_id, _ in self.stores}
+        self._free_lines = 0
+
+    def _contribute(self, key: LineKey, quantity: int, sign: int):
+        """Sumar (sign=1) o restar (sign=-1) una línea"""
+        product_id, pinned_store_id = key
+        store_prices = self.prices.get(product_id, {})
+
+        if pinned_store_id is not None:
+            price_info = store_prices.get(pinned_store_id)
+            self._pinned[2] += sign
+            if price_info and price_info[1]:
+                self._pinned[0] += sign * price_info[0] * quantity
+                self._pinned[1] += sign
+            return
+
+        self._free_lines += sign
+        for store_id, acc in self._free.items():
+            price_info = store_prices.get(store_id)
+            if price_info and price_info[1]:
+                acc[0] += sign * price_info[0] * quantity
+                acc[1] += sign
+
+    def product_ids(self) -> Set[int]:
+        return {product_id for product_id, _ in self.lines}
+
+    def missing_prices(self, deltas: List[CartDelta]) -> List[int]:
+        """Productos nuevos que necesitan precios antes de aplicar los cambios"""
+        return [
+            delta.product_id for delta in deltas
+            if delta.op != "remove" and delta.product_id not in self.prices
+        ]
+
+    def add_prices(self, prices: PriceMap, product_ids: Iterable[int]):
+        """Registrar precios de productos nuevos (sin precio = no disponible)"""
+        for product_id in product_ids:
+            self.prices[product_id] = prices.get(product_id, {})
+
+    def set_quantity(self, key: LineKey, quantity: int):
+        """Cambiar la cantidad de una línea (0 o menos la quita)"""
+        old = self.lines.get(key)
+        if old is not None:
+            self._contribute(key, old, -1)
+
+        if quantity > 0:
+            self.lines[key] = quantity
+            self._contribute(key, quantity, 1)
+        else:
+            # Los precios se conservan: el producto puede volver en el mismo lote
+            self.lines.pop(key, None)
+
+    def apply(self, delta: CartDelta):
+        """Aplicar un cambio; los precios del producto ya deben estar cargados"""
+        key = (delta.product_id, delta.store_id)
+        if delta.op == "add":
+            self.set_quantity(key, self.lines.get(key, 0) + delta.quantity)
+        elif delta.op == "set":
+            self.set_quantity(key, delta.quantity)
+        else:
+            self.set_quantity(key, 0)
+
+    def reprice(self, stores: List[Tuple[int, str]], prices: PriceMap, generation: int):
+        """Recalcular todos los totales con precios nuevos (cambio de catálogo)"""
+        self.stores = stores
+        self.generation = generation
+        self.priced_at = time.monotonic()
+        self._reset_totals()
+        self.prices = {}
+        self.add_prices(prices, self.product_ids())
+        for key, quantity in self.lines.items():
+            self._contribute(key, quantity, 1)
+
+    def items(self) -> List[CartItem]:
+        return [
+            CartItem(product_id=product_id, quantity=quantity, store_id=store_id)
+            for (product_id, store_id), quantity in self.lines.items()
+        ]
+
+    def response(self) -> CartSessionResponse:
+        """Totales ordenados de menor a mayor, igual que compute_cart_totals"""
+        pinned_total, pinned_available, pinned_lines = self._pinned
+        line_count = len(self.lines)
+
+        selection = None
+        if pinned_lines:
+            selection = SelectionTotalResponse(
+                total=total_decimal(pinned_total, pinned_available),
+                items_available=pinned_available,
+                items_unavailable=pinned_lines - pinned_available,
+                items_unpinned=self._free_lines
+            )
+
+        totals = []
+        for store_id, store_name in self.stores:
+            free_total, free_available = self._free[store_id]
+            available = pinned_available + free_available
+            totals.append(StoreTotalResponse(
+                store_id=store_id,
+                store_name=store_name,
+                total=total_decimal(pinned_total + free_total, available),
+                items_available=available,
+                items_unavailable=line_count - available
+            ))
+        totals.sort(key=lambda x: x.total)
+        return CartSessionResponse(
+            session_id=self.session_id, items=self.items(), totals=totals, selection=selection
+        )
+
+
+_sessions = ResponseCache(
+    max_entries=settings.CART_SESSION_MAX_ENTRIES,
+    ttl_seconds=settings.CART_SESSION_TTL_SECONDS
+)
+
+
+class CartSessionService:
+    """
+    Las consultas se hacen FUERA del lock de la sesión: el lock no puede
+    quedar tomado mientras la request espera a la BD (await) y otra request
+    usa la misma sesión. Bajo el lock solo se verifica que lo leído siga
+    sirviendo y se aplican los cambios.
+    """
+
+    # Reintentos si otra request modificó la sesión mientras se leían precios
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, items: List[CartItem]) -> CartSessionResponse:
+        """Crear una sesión con los items iniciales (2 consultas)"""
+        session = CartSession(uuid.uuid4().hex, await fetch_stores_async(self.db), catalog_generation())
+        deltas = [
+            CartDelta(op="add", product_id=item.product_id, quantity=item.quantity, store_id=item.store_id)
+            for item in items
+        ]
+        return await self._apply(session, deltas)
+
+    async def get(self, session_id: str) -> CartSessionResponse:
+        return await self._apply(self._get(session_id), [])
+
+    async def apply_deltas(self, session_id: str, deltas: List[CartDelta]) -> CartSessionResponse:
+        """Aplicar cambios; solo consulta precios de productos nuevos en la sesión"""
+        return await self._apply(self._get(session_id), deltas)
+
+    def delete(self, session_id: str):
+        _sessions.delete(session_id)
+
+    def _get(self, session_id: str) -> CartSession:
+        session = _sessions.get(session_id, _SESSION_GENERATION)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Sesión de carrito no encontrada o expirada")
+        return session
+
+    async def _apply(self, session: CartSession, deltas: List[CartDelta]) -> CartSessionResponse:
+        """
+        La sesión se vuelve a preciar si el catálogo cambió (catalog_version,
+        la incrementan los ingest) o, como respaldo si esa versión no se
+        puede leer, si sus precios tienen más de CART_SESSION_REPRICE_SECONDS:
+        usarla renueva su TTL, pero no sus precios
+        """
+        for _ in range(self.MAX_ATTEMPTS):
+            # 1. Qué falta leer (bajo el lock, sin consultas)
+            generation = catalog_generation()
+            with session.lock:
+                stale = (session.generation != generation
+                         or time.monotonic() - session.priced_at > settings.CART_SESSION_REPRICE_SECONDS)
+                needed = set(session.missing_prices(deltas))
+                if stale:
+                    needed |= session.product_ids()
+
+            # 2. Leer de la BD sin el lock
+            stores = await fetch_stores_async(self.db) if stale else None
+            prices = await fetch_price_map_async(self.db, needed)
+
+            # 3. Aplicar si lo leído sigue alcanzando
+            with session.lock:
+                if stale:
+                    if not session.product_ids() <= needed:
+                        continue
+                    # Volver a preciar si el catálogo cambió desde el último cálculo
+                    session.reprice(stores, prices, generation)
+                elif session.generation != generation:
+                    continue
+
+                missing = session.missing_prices(deltas)
+                if not set(missing) <= needed:
+                    continue
+                session.add_prices(prices, missing)
+                for delta in deltas:
+                    session.apply(delta)
+
+                # Guardar de nuevo renueva el TTL y la posición en el LRU
+                _sessions.set(session.session_id, session, _SESSION_GENERATION)
+                return session.response()
+
+        raise HTTPException(status_code=409, detail="La sesión cambió mientras se calculaba, reintentar")
@@ -0,0 +1,152 @@
+"""
+Generación del catálogo
+Se incrementa cada vez que un ingest confirma cambios de productos o precios;
+los caches la usan para invalidar entradas exactamente cuando cambian los datos.
+Los ingest corren como scripts en otro proceso, así que el valor vive en la
+tabla catalog_version (una fila). La API la lee cada
+CATALOG_VERSION_POLL_SECONDS en un hilo y guarda una copia local:
+catalog_generation() nunca consulta la base de datos.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.session import SessionLocal
+from app.models.catalog_version import CatalogVersion
+
+_lock = threading.Lock()
+_generation = 0
+# Momento (monotonic) de la última lectura o escritura exitosa de catalog_version
+_confirmed_at: Optional[float] = None
+_listeners: List[Callable[[int], None]] = []
+_poll_stop = threading.Event()
+_poll_thread: Optional[threading.Thread] = None
+
+
+def catalog_generation() -> int:
+    """Última generación conocida del catálogo (copia local)"""
+    return _generation
+
+
+def catalog_generation_is_current() -> bool:
+    """
+    True si la copia local se confirmó contra catalog_version hace menos de
+    tres intervalos de sondeo. Si el sondeo falla o se atrasa, la generación
+    local puede estar vieja y no sirve para validar respuestas sin recalcular
+    """
+    confirmed_at = _confirmed_at
+    if confirmed_at is None:
+        return False
+    return time.monotonic() - confirmed_at <= 3 * settings.CATALOG_VERSION_POLL_SECONDS
+
+
+def _confirm():
+    global _confirmed_at
+    _confirmed_at = time.monotonic()
+
+
+def on_catalog_change(listener: Callable[[int], None]):
+    """Llamar a `listener(generación)` cada vez que la generación cambie en este proceso"""
+    _listeners.append(listener)
+
+
+def _publish(generation: int) -> bool:
+    """Guardar la generación local; True (y avisa a los suscriptores) si cambió"""
+    global _generation
+    with _lock:
+        if generation == _generation:
+            return False
+        _generation = generation
+
+    for listener in list(_listeners):
+        try:
+            listener(generation)
+        except Exception as e:
+            print(f"⚠️  Error avisando el cambio de catálogo: {e}")
+    return True
+
+
+def bump_catalog_generation(db: Session) -> int:
+    """
+    Marcar el catálogo como modificado (llamar después del commit del ingest).
+    Incrementa la fila compartida en una transacción propia. Si la tabla no
+    existe (falta scripts/add_catalog_version.py) solo cambia la copia local
+    y los demás procesos dependen del TTL de sus caches
+    """
+    stmt = insert(CatalogVersion).values(id=1, generation=1, updated_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.id],
+        set_={"generation": CatalogVersion.generation + 1, "updated_at": stmt.excluded.updated_at}
+    ).returning(CatalogVersion.generation)
+
+    try:
+        generation = db.execute(stmt).scalar_one()
+        db.commit()
+        _confirm()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  No se pudo actualizar catalog_version: {e}")
+        print("   Ejecutar scripts/add_catalog_version.py")
+        generation = _generation + 1
+
+    _publish(generation)
+    return generation
+
+
+def read_catalog_generation(db: Session) -> int:
+    """Generación guardada en catalog_version (0 si todavía no hubo ingest)"""
+    return db.execute(
+        select(CatalogVersion.generation).where(CatalogVersion.id == 1)
+    ).scalar() or 0
+
+
+def refresh_catalog_generation() -> bool:
+    """Leer la generación compartida; True si cambió desde la última lectura"""
+    db = SessionLocal()
+    try:
+        generation = read_catalog_generation(db)
+    finally:
+        db.close()
+    _confirm()
+    return _publish(generation)
+
+
+def start_catalog_version_poll(interval_seconds: float):
+    """Leer catalog_version ahora (en el llamador) y luego cada `interval_seconds` (en un hilo)"""
+    global _poll_thread
+    if _poll_thread is not None:
+        return
+
+    def poll(failing: bool) -> bool:
+        """Una lectura; retorna si falló (un aviso por racha de errores)"""
+        try:
+            refresh_catalog_generation()
+        except Exception as e:
+            if not failing:
+                print(f"⚠️  No se pudo leer catalog_version: {e}")
+            return True
+        if failing:
+            print("✓ catalog_version disponible de nuevo")
+        return False
+
+    first_failed = poll(False)
+
+    def loop():
+        failing = first_failed
+        while not _poll_stop.wait(interval_seconds):
+            failing = poll(failing)
+
+    _poll_stop.clear()
+    _poll_thread = threading.Thread(target=loop, name="catalog-version-poll", daemon=True)
+    _poll_thread.start()
+
+
+def stop_catalog_version_poll():
+    global _poll_thread
+    _poll_stop.set()
+    _poll_thread = None
@@ -0,0 +1,126 @@
+"""
+Contenedor para índices en memoria que se reconstruyen en segundo plano
+El índice vigente es inmutable y se reemplaza de forma atómica
+"""
+
+import threading
+import traceback
+from datetime import datetime
+from typing import Callable, Generic, List, Optional, TypeVar
+from sqlalchemy.orm import Session
+from app.database.session import SessionLocal
+
+T = TypeVar("T")
+
+_holders: List["IndexHolder"] = []
+_refresh_stop = threading.Event()
+_refresh_thread: Optional[threading.Thread] = None
+
+
+class IndexHolder(Generic[T]):
+    """
+    Mantiene la versión vigente de un índice construido desde la base de datos.
+    - get() nunca bloquea: devuelve el índice actual o None si aún no existe
+    - rebuild() construye uno nuevo y lo intercambia al terminar
+    - Solo los índices activados (activate) se reconstruyen; así los scripts
+      de scraping no construyen índices que nadie va a usar
+    """
+
+    def __init__(self, name: str, builder: Callable[[Session], T]):
+        self.name = name
+        self.built_at: Optional[datetime] = None
+        self._builder = builder
+        self._current: Optional[T] = None
+        self._active = False
+        self._pending = False
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        _holders.append(self)
+
+    @property
+    def is_active(self) -> bool:
+        return self._active
+
+    def activate(self):
+        """Habilitar el índice en este proceso"""
+        self._active = True
+
+    def get(self) -> Optional[T]:
+        return self._current
+
+    def rebuild(self):
+        """Construir el índice de forma síncrona e intercambiarlo"""
+        db = SessionLocal()
+        try:
+            index = self._builder(db)
+        finally:
+            db.close()
+
+        # Asignación atómica: las búsquedas en curso siguen usando el anterior
+        self._current = index
+        self.built_at = datetime.utcnow()
+
+    def rebuild_in_background(self):
+        """
+        Programar una reconstrucción en un hilo aparte.
+        Si ya hay una en curso, se repite al terminar (no se encolan más).
+        """
+        if not self._active:
+            return
+
+        with self._lock:
+            self._pending = True
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_pending,
+                name=f"rebuild-{self.name}",
+                daemon=True
+            )
+            self._worker.start()
+
+    def _run_pending(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._pending = False
+            try:
+                self.rebuild()
+                print(f"✓ Índice '{self.name}' reconstruido")
+            except Exception as e:
+                print(f"⚠️  Error reconstruyendo índice '{self.name}': {e}")
+                traceback.print_exc()
+
+
+def rebuild_active_indexes():
+    """Reconstruir en segundo plano todos los índices activos (tras un ingest)"""
+    for holder in _holders:
+        holder.rebuild_in_background()
+
+
+def start_index_refresh(interval_seconds: int):
+    """
+    Reconstruir los índices activos ahora y luego cada `interval_seconds`.
+    Cubre los scrapers que corren como scripts en otro proceso.
+    """
+    global _refresh_thread
+
+    rebuild_active_indexes()
+
+    if interval_seconds <= 0 or _refresh_thread is not None:
+        return
+
+    def loop():
+        while not _refresh_stop.wait(interval_seconds):
+            rebuild_active_indexes()
+
+    _refresh_stop.clear()
+    _refresh_thread = threading.Thread(target=loop, name="index-refresh", daemon=True)
+    _refresh_thread.start()
+
+
+def stop_index_refresh():
+    global _refresh_thread
+    _refresh_stop.set()
+    _refresh_thread = None
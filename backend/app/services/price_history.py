@@ -0,0 +1,249 @@
+"""
+Historial de precios (tabla price_history particionada por mes)
+- PriceHistoryRecorder: durante un ingest junta los cambios de precio o
+  disponibilidad y los inserta por lotes
+- ensure_partitions / detach_old_partitions: mantenimiento de particiones
+- PriceHistoryService: precios de un producto en los últimos N días
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import select, text, false, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import PriceHistory, Product, Store, StorePrice
+from app.schemas.product import PriceHistoryResponse, PricePoint, StorePriceHistory
+
+_PARTITION_RE = re.compile(r"^price_history_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"price_history_y{month.year}m{month.month:02d}"
+
+
+def list_partitions(db) -> List[Tuple[str, date]]:
+    """Particiones conectadas a price_history con el mes que cubren, en orden"""
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'price_history'
+    """)).scalars().all()
+
+    partitions = []
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(db, months_ahead: int = None, today: Optional[date] = None) -> List[str]:
+    """
+    Crear la partición del mes actual y de los `months_ahead` siguientes.
+    Retorna los nombres de las particiones creadas (vacío si ya existían)
+    """
+    if months_ahead is None:
+        months_ahead = settings.PRICE_HISTORY_MONTHS_AHEAD
+    current = month_start(today or datetime.utcnow().date())
+    existing = {name for name, _ in list_partitions(db)}
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF price_history "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    db.commit()
+    return created
+
+
+def detach_old_partitions(db, retention_months: int = None, drop: bool = False,
+                          today: Optional[date] = None) -> List[str]:
+    """
+    Desconectar las particiones cuyos datos son todos más viejos que
+    `retention_months` meses (quedan como tablas sueltas, o se borran con
+    drop=True). Retorna los nombres afectados
+    """
+    if retention_months is None:
+        retention_months = settings.PRICE_HISTORY_RETENTION_MONTHS
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -retention_months)
+
+    detached = []
+    for name, month in list_partitions(db):
+        if add_months(month, 1) > cutoff:
+            continue
+        db.execute(text(f"ALTER TABLE price_history DETACH PARTITION {name}"))
+        if drop:
+            db.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    db.commit()
+    return detached
+
+
+class PriceHistoryRecorder:
+    """
+    Cambios de precio de un ingest, insertados por lotes de `batch_size`.
+    Los servicios de ingest calculan la fila con change() ANTES de
+    modificar el StorePrice y la agregan con add() después del commit,
+    así un producto que falla no deja historial.
+    Si price_history no existe (falta scripts/manage_price_history.py)
+    el historial se desactiva sin afectar el ingest.
+    """
+
+    def __init__(self, db: Session, batch_size: int = None):
+        self.db = db
+        self.batch_size = batch_size or settings.PRICE_HISTORY_BATCH_SIZE
+        self.written = 0
+        self._rows: List[dict] = []
+        self._ready: Optional[bool] = None
+
+    @staticmethod
+    def change(store_price: Optional[StorePrice], product_id: int, store_id: int,
+               price: Decimal, is_available: bool) -> Optional[dict]:
+        """Fila de historial si el precio o la disponibilidad cambió; None si no"""
+        if (store_price is not None
+                and store_price.price == price
+                and bool(store_price.is_available) == is_available):
+            return None
+        return {
+            "product_id": product_id,
+            "store_id": store_id,
+            "price": price,
+            "is_available": is_available,
+            "recorded_at": datetime.utcnow(),
+        }
+
+    def add(self, row: Optional[dict]):
+        if row is None:
+            return
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def _ensure_ready(self) -> bool:
+        """Crear las particiones necesarias una vez por ingest"""
+        if self._ready is None:
+            try:
+                ensure_partitions(self.db)
+                self._ready = True
+            except Exception as e:
+                self.db.rollback()
+                self._ready = False
+                print(f"⚠️  Historial de precios desactivado: {e}")
+                print("   Ejecutar scripts/manage_price_history.py")
+        return self._ready
+
+    def flush(self):
+        """Insertar los cambios pendientes con un solo INSERT de varias filas"""
+        rows, self._rows = self._rows, []
+        if not rows or not self._ensure_ready():
+            return
+        try:
+            self.db.execute(insert(PriceHistory).values(rows).on_conflict_do_nothing())
+            self.db.commit()
+            self.written += len(rows)
+        except Exception as e:
+            self.db.rollback()
+            print(f"⚠️  Error guardando historial de precios ({len(rows)} filas): {e}")
+
+    def record_unavailable(self, store_id: int, available_product_ids: List[int]):
+        """
+        Historial para los productos que mark_unavailable_products va a marcar
+        como no disponibles (INSERT ... SELECT, sin traerlos a Python).
+        Se ejecuta en la transacción del UPDATE, antes de él, dentro de un
+        SAVEPOINT: si falla se pierde solo el historial, no el UPDATE
+        """
+        if not self._ensure_ready():
+            return
+        query = select(
+            StorePrice.product_id, StorePrice.store_id, StorePrice.price,
+            false(), literal(datetime.utcnow())
+        ).where(
+            StorePrice.store_id == store_id,
+            StorePrice.is_available,
+            ~StorePrice.product_id.in_(available_product_ids)
+        )
+        try:
+            with self.db.begin_nested():
+                self.db.execute(
+                    insert(PriceHistory)
+                    .from_select(["product_id", "store_id", "price", "is_available", "recorded_at"], query)
+                    .on_conflict_do_nothing()
+                )
+        except Exception as e:
+            print(f"⚠️  Error guardando historial de no disponibles (tienda {store_id}): {e}")
+
+
+class PriceHistoryService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_history(self, product_id: int, days: int) -> PriceHistoryResponse:
+        """
+        Precios de un producto en cada tienda durante los últimos `days` días.
+        Cada serie empieza con el precio vigente al inicio del período (el
+        último cambio anterior), así el gráfico no queda vacío si el precio
+        no cambió. Solo lee las particiones del período más, para el precio
+        inicial, un acceso por índice en las anteriores.
+        """
+        if await self.db.get(Product, product_id) is None:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+        since = datetime.utcnow() - timedelta(days=days)
+
+        initial = (await self.db.execute(
+            select(PriceHistory)
+            .where(PriceHistory.product_id == product_id, PriceHistory.recorded_at < since)
+            .order_by(PriceHistory.store_id, PriceHistory.recorded_at.desc())
+            .distinct(PriceHistory.store_id)
+        )).scalars().all()
+
+        changes = (await self.db.execute(
+            select(PriceHistory)
+            .where(PriceHistory.product_id == product_id, PriceHistory.recorded_at >= since)
+            .order_by(PriceHistory.store_id, PriceHistory.recorded_at)
+        )).scalars().all()
+
+        # initial es anterior a `since` y changes posterior: quedan en orden
+        points: Dict[int, List[PricePoint]] = {}
+        for row in list(initial) + list(changes):
+            points.setdefault(row.store_id, []).append(PricePoint(
+                recorded_at=row.recorded_at,
+                price=row.price,
+                is_available=row.is_available
+            ))
+
+        store_names = dict((await self.db.execute(
+            select(Store.id, Store.name).where(Store.id.in_(list(points)))
+        )).all()) if points else {}
+
+        return PriceHistoryResponse(
+            product_id=product_id,
+            days=days,
+            since=since,
+            stores=[
+                StorePriceHistory(store_id=store_id, store_name=store_names.get(store_id, ""), points=series)
+                for store_id, series in sorted(points.items())
+            ]
+        )
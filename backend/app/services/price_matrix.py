@@ -0,0 +1,166 @@
+"""
+Matriz densa de precios productos x tiendas en memoria (NumPy)
+Permite calcular los totales de un carrito sin consultar la base de datos:
+un gather de filas más un producto punto con las cantidades
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models import StorePrice
+from app.config import settings
+from app.schemas.cart import (
+    CartItem, CartTotalsResponse, StoreTotalResponse, SelectionTotalResponse
+)
+from app.services.cart_pricing import fetch_stores, total_decimal
+from app.services.catalog_version import catalog_generation
+from app.services.index_holder import IndexHolder
+from app.utils.money import to_cents
+
+
+class PriceMatrix:
+    """
+    - cents[fila, tienda]: precio en céntimos (int32, 0 si no hay precio)
+    - available[fila]: bits de disponibilidad por tienda (bitmask empaquetado,
+      un bit por tienda, 1 = disponible)
+    Las filas corresponden a `product_ids` (ordenados) y las columnas a
+    `stores` en el mismo orden que calculate_cart_totals.
+    """
+
+    def __init__(self, stores: List[Tuple[int, str]], product_ids: np.ndarray,
+                 cents: np.ndarray, available: np.ndarray, generation: int):
+        self.stores = stores
+        self.product_ids = product_ids
+        self.cents = cents
+        self.available = available
+        self.generation = generation
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    def _rows(self, product_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Fila de cada producto y máscara de los que existen (matriz no vacía)"""
+        ids = np.asarray(product_ids, dtype=np.int64)
+        rows = np.searchsorted(self.product_ids, ids)
+        rows = np.minimum(rows, len(self.product_ids) - 1)
+        return rows, self.product_ids[rows] == ids
+
+    def _availability(self, rows: np.ndarray, found: np.ndarray) -> np.ndarray:
+        """Matriz booleana items x tiendas desempaquetando los bitmasks"""
+        bits = np.unpackbits(self.available[rows], axis=1, count=len(self.stores), bitorder="little")
+        return bits.astype(bool) & found[:, None]
+
+    def store_counts(self, product_ids: List[int]) -> np.ndarray:
+        """Tiendas donde está disponible cada producto (popcount del bitmask)"""
+        if not len(self.product_ids):
+            return np.zeros(len(product_ids), dtype=np.int64)
+        rows, found = self._rows(product_ids)
+        return self._availability(rows, found).sum(axis=1)
+
+    def cart_totals(self, items: List[CartItem]) -> CartTotalsResponse:
+        """Mismo resultado que compute_cart_totals, sin consultas"""
+        pinned = [item for item in items if item.store_id is not None]
+        free = [item for item in items if item.store_id is None]
+        columns = {store_id: column for column, (store_id, _) in enumerate(self.stores)}
+
+        # Items fijos en una tienda: un subtotal que se suma a todas las columnas
+        pinned_cents = 0
+        pinned_available = 0
+        if pinned and len(self.product_ids):
+            rows, found = self._rows([item.product_id for item in pinned])
+            available = self._availability(rows, found)
+            for item, row, item_available in zip(pinned, rows, available):
+                column = columns.get(item.store_id)
+                if column is not None and item_available[column]:
+                    pinned_cents += int(self.cents[row, column]) * item.quantity
+                    pinned_available += 1
+
+        selection = None
+        if pinned:
+            selection = SelectionTotalResponse(
+                total=total_decimal(pinned_cents, pinned_available),
+                items_available=pinned_available,
+                items_unavailable=len(pinned) - pinned_available,
+                items_unpinned=len(free)
+            )
+
+        stores_total = np.zeros(len(self.stores), dtype=np.int64)
+        available_count = np.zeros(len(self.stores), dtype=np.int64)
+
+        if free and len(self.stores) and len(self.product_ids):
+            rows, found = self._rows([item.product_id for item in free])
+            quantities = np.asarray([item.quantity for item in free], dtype=np.int64)
+            available = self._availability(rows, found)
+
+            prices = np.where(available, self.cents[rows].astype(np.int64), 0)
+            stores_total = quantities @ prices
+            available_count = available.sum(axis=0)
+
+        totals = []
+        for column, (store_id, store_name) in enumerate(self.stores):
+            count = pinned_available + int(available_count[column])
+            cents = pinned_cents + int(stores_total[column])
+            totals.append(StoreTotalResponse(
+                store_id=store_id,
+                store_name=store_name,
+                total=total_decimal(cents, count),
+                items_available=count,
+                items_unavailable=len(items) - count
+            ))
+
+        totals.sort(key=lambda x: x.total)
+        return CartTotalsResponse(totals=totals, selection=selection)
+
+
+def build_price_matrix(db: Session) -> PriceMatrix:
+    """Construir la matriz con dos consultas (tiendas y precios)"""
+    generation = catalog_generation()
+    stores = fetch_stores(db)
+    columns: Dict[int, int] = {store_id: i for i, (store_id, _) in enumerate(stores)}
+
+    rows = db.query(
+        StorePrice.product_id, StorePrice.store_id, StorePrice.price, StorePrice.is_available
+    ).order_by(StorePrice.product_id).all()
+
+    product_ids = np.unique(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)))
+    cents = np.zeros((len(product_ids), len(stores)), dtype=np.int32)
+    available = np.zeros((len(product_ids), len(stores)), dtype=bool)
+
+    for product_id, store_id, price, is_available in rows:
+        column = columns.get(store_id)
+        if column is None:
+            continue
+        row = np.searchsorted(product_ids, product_id)
+        cents[row, column] = to_cents(price)
+        available[row, column] = bool(is_available)
+
+    return PriceMatrix(
+        stores=stores,
+        product_ids=product_ids,
+        cents=cents,
+        available=np.packbits(available, axis=1, bitorder="little"),
+        generation=generation
+    )
+
+
+price_matrix: IndexHolder[PriceMatrix] = IndexHolder("prices", build_price_matrix)
+
+
+def current_price_matrix() -> Optional[PriceMatrix]:
+    """
+    Matriz vigente o None si hay que leer los precios de la BD:
+    - construida con otra generación del catálogo (se está reconstruyendo:
+      la API la reconstruye cada vez que cambia catalog_version)
+    - con más de RESPONSE_CACHE_TTL_SECONDS, respaldo por si catalog_version
+      no se puede leer: no da precios más viejos que el cache de respuestas.
+      Programa una reconstrucción
+    """
+    matrix = price_matrix.get() if settings.PRICE_MATRIX_ENABLED else None
+    if matrix is None or matrix.generation != catalog_generation():
+        return None
+    if time.monotonic() - matrix.built_at > settings.RESPONSE_CACHE_TTL_SECONDS:
+        price_matrix.rebuild_in_background()
+        return None
+    return matrix
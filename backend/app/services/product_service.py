@@ -1,98 +1,661 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import and_, case, distinct, or_, func, literal, select, tuple_, union
+from sqlalchemy.exc import ProgrammingError
+from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
-from app.models import Product, Brand, Category, StorePrice
+from app.config import settings
+from app.models import Product, Brand, Category, StorePrice, ProductBestPrice
 from app.models.store import Store
-from app.schemas.product import ProductResponse, PriceInfo
-from app.schemas.cart import CartItem, CartTotalsResponse, StoreTotalResponse
+from app.schemas.product import (
+    ProductResponse, PriceInfo, ProductPageResponse, ProductBatchResponse,
+    FacetCount, SearchFacetsResponse, SearchSort
+)
+from app.schemas.cart import (
+    CartItem, CartTotalsResponse, CartOptimizeRequest, CartOptimizeResponse,
+    OptimizedItemResponse, StorePlanResponse
+)
+from app.services.basket_optimizer import optimize_basket
+from app.services.price_matrix import current_price_matrix
+from app.services.cart_pricing import PriceMap, fetch_stores_async, fetch_price_map_async, compute_cart_totals
+from app.services.ranking import RankDocument, bm25_top_k
+from app.services.response_cache import response_cache
+from app.services.catalog_version import catalog_generation
+from app.services.search_index import search_index, tokenize, sort_facets, page_by_unit
+from app.utils.helpers import NORMALIZED_UNITS, fold_search_text, encode_cursor, decode_cursor
+from app.utils.money import to_cents, cents_to_decimal
 from fastapi import HTTPException
 
+
+# SQLSTATE undefined_function: falta f_unaccent o pg_trgm (word_similarity, <%)
+_UNDEFINED_FUNCTION = "42883"
+
+# True si la base no tiene f_unaccent o pg_trgm (falta
+# scripts/add_search_indexes.py): la búsqueda usa ILIKE hasta reiniciar la API
+_trigram_missing = False
+
+
+def _search_backend() -> str:
+    """Backend de búsqueda por texto en uso: SEARCH_BACKEND, o "ilike" si trigram no está disponible"""
+    if settings.SEARCH_BACKEND == "trigram" and not _trigram_missing:
+        return "trigram"
+    return "ilike"
+
+
+def _is_missing_function(error: ProgrammingError) -> bool:
+    return getattr(error.orig, "pgcode", None) == _UNDEFINED_FUNCTION
+
+
+def _folded(column):
+    """
+    Expresión sin tildes y en minúsculas.
+    Debe ser idéntica a la de los índices GIN de scripts/add_search_indexes.py
+    """
+    return func.f_unaccent(func.lower(column))
+
+
+def _like_pattern(term: str) -> str:
+    """Patrón '%term%' escapando los comodines de LIKE (con ESCAPE '!')"""
+    term = term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+    return f"%{term}%"
+
+
+def _load_prices():
+    """Precios y nombre de tienda en una sola consulta adicional (SELECT ... IN)"""
+    return selectinload(Product.prices).joinedload(StorePrice.store)
+
+
+def _rank_candidates(query: str, candidates) -> List[tuple]:
+    """Ranking BM25 de los candidatos (id, nombre, marca, categoría): [(score, id)]"""
+    return bm25_top_k(
+        tokenize(query),
+        [
+            RankDocument(product_id, {
+                "name": tokenize(name),
+                "brand": tokenize(brand_name),
+                "category": tokenize(category_name),
+            })
+            for product_id, name, brand_name, category_name in candidates
+        ],
+        k=settings.SEARCH_MAX_RESULTS
+    )
+
+
 class ProductService:
-    def __init__(self, db: Session):
+    """
+    Lecturas del catálogo para la API, con la sesión asíncrona: cada
+    consulta es un `await` y no ocupa el event loop. Lo que es CPU pura
+    (ranking BM25, índice en memoria, optimizador, lotes de carritos) corre
+    en el threadpool con run_in_threadpool.
+    """
+    
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def search_products(self, query: str = None, category_id: int = None) -> List[ProductResponse]:
+    async def _cached(self, key: tuple, compute):
+        """Resolver desde el cache de respuestas (si está habilitado)"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return await compute()
+        return await response_cache.get_or_set_async(key, compute)
+    
+    async def _all(self, stmt) -> list:
+        """Filas de una consulta"""
+        return (await self.db.execute(stmt)).all()
+    
+    async def _with_text_fallback(self, query: Optional[str], run):
+        """
+        Ejecutar `await run()`. Si la búsqueda trigram falla porque la base no
+        tiene f_unaccent o pg_trgm, se repite con ILIKE en vez de fallar (y
+        las siguientes búsquedas usan ILIKE directamente)
+        """
+        global _trigram_missing
+        if not (query and query.strip()) or _search_backend() != "trigram":
+            return await run()
+        
+        try:
+            return await run()
+        except ProgrammingError as e:
+            if not _is_missing_function(e):
+                raise
+            await self.db.rollback()
+            _trigram_missing = True
+            print(f"⚠️  Búsqueda trigram no disponible, se usa ILIKE: {e.orig}")
+            print("   Ejecutar scripts/add_search_indexes.py y reiniciar la API")
+        
+        return await run()
+    
+    def _normalize_query(self, query: Optional[str]) -> str:
+        """Texto de búsqueda normalizado para las claves de cache"""
+        if _search_backend() == "ilike" and not settings.SEARCH_IN_MEMORY:
+            # ILIKE distingue tildes y espacios: solo normalizamos mayúsculas
+            return (query or "").lower()
+        return fold_search_text(query or "")
+    
+    async def search_products(self, query: str = None, category_id: int = None,
+                              sort: SearchSort = "relevance") -> List[ProductResponse]:
+        """Buscar productos (con cache por parámetros normalizados)"""
+        return await self._cached(
+            ("search", self._normalize_query(query), category_id, sort),
+            lambda: self._with_text_fallback(query, lambda: self._search_products(query, category_id, sort))
+        )
+    
+    async def search_facets(self, query: str = None, category_id: int = None) -> SearchFacetsResponse:
+        """Conteos por categoría, marca y tienda para los filtros de búsqueda"""
+        return await self._cached(
+            ("facets", self._normalize_query(query), category_id),
+            lambda: self._with_text_fallback(query, lambda: self._search_facets(query, category_id))
+        )
+    
+    async def _search_facets(self, query: str = None, category_id: int = None) -> SearchFacetsResponse:
+        """
+        Calcular las facetas con UNA consulta agrupada (GROUPING SETS) sobre
+        todos los productos que coinciden, o desde el índice en memoria
+        """
+        index = search_index.get() if settings.SEARCH_IN_MEMORY else None
+        if index is not None:
+            return await run_in_threadpool(index.facets, query, category_id)
+        
+        matches = select(Product.id.label("product_id"), Product.brand_id, Product.category_id)
+        
+        if query and len(query.strip()) > 0:
+            matches = matches.where(self._text_filter(query))
+        if category_id:
+            matches = matches.where(Product.category_id == category_id)
+        
+        m = matches.subquery()
+        
+        rows = await self._all(select(
+            func.grouping(m.c.category_id).label("by_category"),
+            func.grouping(m.c.brand_id).label("by_brand"),
+            m.c.category_id, Category.name,
+            m.c.brand_id, Brand.name,
+            StorePrice.store_id, Store.name,
+            func.count(distinct(m.c.product_id))
+        ).select_from(m).join(
+            Category, Category.id == m.c.category_id
+        ).join(
+            Brand, Brand.id == m.c.brand_id
+        ).outerjoin(
+            StorePrice, and_(StorePrice.product_id == m.c.product_id, StorePrice.is_available.is_(True))
+        ).outerjoin(
+            Store, Store.id == StorePrice.store_id
+        ).group_by(
+            func.grouping_sets(
+                tuple_(m.c.category_id, Category.name),
+                tuple_(m.c.brand_id, Brand.name),
+                tuple_(StorePrice.store_id, Store.name)
+            )
+        ))
+        
+        categories, brands, stores = [], [], []
+        for (by_category, by_brand, cat_id, cat_name, brand_id, brand_name,
+             store_id, store_name, count) in rows:
+            if by_category == 0:
+                categories.append(FacetCount(id=cat_id, name=cat_name, count=count))
+            elif by_brand == 0:
+                brands.append(FacetCount(id=brand_id, name=brand_name, count=count))
+            elif store_id is not None:
+                stores.append(FacetCount(id=store_id, name=store_name, count=count))
+        
+        return SearchFacetsResponse(
+            categories=sort_facets(categories),
+            brands=sort_facets(brands),
+            stores=sort_facets(stores)
+        )
+    
+    async def _search_products(self, query: str = None, category_id: int = None,
+                               sort: SearchSort = "relevance") -> List[ProductResponse]:
         """
         Buscar productos de forma flexible:
         - Solo texto
         - Solo categoría
         - Texto + Categoría
+        Con sort="unit_price" se ordena por el menor precio por kg / l / unidad
+        y con sort="price" por el menor precio disponible.
         """
-        # Iniciamos la consulta base uniendo tablas necesarias
-        q = self.db.query(Product).join(Brand).join(Category)
-
-        # 1. Si el usuario escribió texto (ej: "Arroz"), filtramos por nombre o marca
-        if query and len(query.strip()) > 0:
-            q = q.filter(
-                or_(
-                    Product.name.ilike(f"%{query}%"),
-                    Brand.name.ilike(f"%{query}%")
-                )
+        # Índice en memoria: responde sin consultar la base de datos
+        index = search_index.get() if settings.SEARCH_IN_MEMORY else None
+        if index is not None:
+            return await run_in_threadpool(
+                index.search, query, category_id, limit=settings.SEARCH_MAX_RESULTS, sort=sort
             )
         
-        # 2. Si el usuario seleccionó categoría, agregamos ese filtro también
-        if category_id:
-            q = q.filter(Product.category_id == category_id)
+        if sort == "unit_price":
+            return await self._search_by_unit_price(query, category_id)
+        if sort == "price":
+            return await self._search_by_best_price(query, category_id)
+        
+        # 1. Si el usuario escribió texto (ej: "Arroz"), buscamos y rankeamos
+        if query and len(query.strip()) > 0:
+            return await self._search_ranked(query, category_id)
         
-        # Ejecutamos la consulta limitando a 50 resultados para no saturar
-        products = q.limit(50).all()
+        # 2. Solo categoría: marca y categoría vienen en el mismo SELECT y los
+        # precios en una segunda consulta (2 consultas en total)
+        products = await self._products(self._query_with_details().where(
+            Product.category_id == category_id
+        ).order_by(Product.id).limit(settings.SEARCH_MAX_RESULTS))
         
         return [self._build_product_response(p) for p in products]
     
-    def get_product_by_id(self, product_id: int) -> ProductResponse:
-        """Obtener producto por ID"""
-        product = self.db.query(Product).filter(Product.id == product_id).first()
+    async def _search_ranked(self, query: str, category_id: int = None) -> List[ProductResponse]:
+        """
+        Búsqueda por texto en dos fases:
+        1. Candidatos livianos (id, nombre, marca, categoría) filtrados en SQL
+        2. Ranking BM25 con heap acotado (en el threadpool) y carga completa
+           solo del top-k
+        """
+        q = select(Product.id, Product.name, Brand.name, Category.name).join(
+            Brand, Brand.id == Product.brand_id
+        ).join(Category, Category.id == Product.category_id)
+        
+        q = q.where(self._text_filter(query))
+        if _search_backend() == "trigram":
+            q = q.order_by(self._trigram_similarity(query).desc())
+        else:
+            q = q.order_by(self._match_rank(query))
+        
+        if category_id:
+            q = q.where(Product.category_id == category_id)
+        
+        candidates = await self._all(q.order_by(Product.id).limit(settings.SEARCH_CANDIDATES))
+        ranked = await run_in_threadpool(_rank_candidates, query, candidates)
+        
+        products = await self._load_products([product_id for _, product_id in ranked])
+        return [
+            self._build_product_response(products[product_id], score=round(score, 4))
+            for score, product_id in ranked
+        ]
+    
+    async def _search_by_unit_price(self, query: str = None, category_id: int = None) -> List[ProductResponse]:
+        """
+        Los más baratos por kg / l / unidad de cada unidad (un precio por kg
+        no se compara con uno por litro), leídos de product_best_prices con
+        una consulta por unidad (índice idx_product_best_prices_unit_price) y
+        repartidos en la página con page_by_unit.
+        Los productos sin cantidad conocida van al final.
+        """
+        view = ProductBestPrice.__table__
+        
+        def aggregate():
+            best = select(
+                StorePrice.product_id,
+                func.min(StorePrice.unit_price).label("min_unit_price")
+            ).where(StorePrice.is_available.is_(True)).group_by(StorePrice.product_id).subquery()
+            return best, (Product.unit, best.c.min_unit_price)
+        
+        return await self._search_best(query, category_id, view, (view.c.unit, view.c.min_unit_price),
+                                       aggregate, self._search_per_unit)
+    
+    async def _search_by_best_price(self, query: str = None, category_id: int = None) -> List[ProductResponse]:
+        """
+        Resultados ordenados por el menor precio disponible, leído de la vista
+        materializada product_best_prices (sin agregar store_prices).
+        Los productos sin precios disponibles van al final.
+        """
+        view = ProductBestPrice.__table__
+        
+        def aggregate():
+            best = select(
+                StorePrice.product_id,
+                func.min(StorePrice.price).label("min_price")
+            ).where(StorePrice.is_available.is_(True)).group_by(StorePrice.product_id).subquery()
+            return best, (best.c.min_price,)
+        
+        return await self._search_best(query, category_id, view, (view.c.min_price,),
+                                       aggregate, self._search_ordered)
+    
+    async def _search_best(self, query: Optional[str], category_id: Optional[int],
+                           view, order_columns: tuple, aggregate, search) -> List[ProductResponse]:
+        """
+        Ordenar con `search` (_search_ordered o _search_per_unit) por columnas
+        de product_best_prices. Si la vista no existe o es anterior a esas
+        columnas (falta scripts/add_best_prices.py), se calcula el mismo orden
+        con el agregado de store_prices que arma `aggregate` en vez de fallar
+        """
+        try:
+            return await search(query, category_id, view, order_columns)
+        except ProgrammingError as e:
+            if _is_missing_function(e):
+                raise  # búsqueda trigram sin f_unaccent/pg_trgm: ver _with_text_fallback
+            await self.db.rollback()
+            print(f"⚠️  product_best_prices no disponible, se agrega store_prices: {e.orig}")
+        
+        best, order_columns = aggregate()
+        return await search(query, category_id, best, order_columns)
+    
+    async def _search_ordered(self, query: Optional[str], category_id: Optional[int],
+                              best, order_columns: tuple) -> List[ProductResponse]:
+        """
+        Filtrar por texto/categoría y ordenar por `order_columns` de `best` (una
+        fila por producto); si no se completa la página, se agregan al final
+        los productos sin valor, por ID.
+        """
+        limit = settings.SEARCH_MAX_RESULTS
+        product_ids = await self._ordered_ids(query, category_id, best, order_columns, limit)
+        product_ids += await self._ids_without_values(
+            query, category_id, best, order_columns, limit - len(product_ids)
+        )
+        return await self._load_responses(product_ids)
+    
+    async def _search_per_unit(self, query: Optional[str], category_id: Optional[int],
+                               best, order_columns: tuple) -> List[ProductResponse]:
+        """
+        Como _search_ordered con order_columns = (unidad, precio unitario),
+        pero con una consulta por unidad (WHERE unidad = ...): cada unidad
+        trae sus `limit` más baratos aunque otra unidad ordene antes, y
+        page_by_unit reparte la página entre ellas
+        """
+        limit = settings.SEARCH_MAX_RESULTS
+        unit_column = order_columns[0]
+        
+        groups = {}
+        for unit in NORMALIZED_UNITS:
+            product_ids = await self._ordered_ids(
+                query, category_id, best, order_columns, limit, unit_column == unit
+            )
+            if product_ids:
+                groups[unit] = product_ids
+        
+        product_ids = page_by_unit(groups, limit)
+        product_ids += await self._ids_without_values(
+            query, category_id, best, order_columns, limit - len(product_ids)
+        )
+        return await self._load_responses(product_ids)
+    
+    async def _ordered_ids(self, query: Optional[str], category_id: Optional[int],
+                           best, order_columns: tuple, limit: int, *conditions) -> List[int]:
+        """
+        IDs con valor en todas las `order_columns`, en ese orden. La consulta
+        parte de `best` con INNER JOIN, así el índice (order_columns...,
+        product_id) entrega las filas ya ordenadas y corta en el LIMIT
+        """
+        has_values = and_(*(column.isnot(None) for column in order_columns))
+        ranked = self._filter_search(
+            select(Product.id).select_from(best).join(Product, Product.id == best.c.product_id),
+            query, category_id
+        ).where(has_values, *conditions)
+        return list(await self.db.scalars(
+            ranked.order_by(*order_columns, best.c.product_id).limit(limit)
+        ))
+    
+    async def _ids_without_values(self, query: Optional[str], category_id: Optional[int],
+                                  best, order_columns: tuple, limit: int) -> List[int]:
+        """Hasta `limit` IDs sin valor en alguna de las `order_columns`, por ID"""
+        if limit <= 0:
+            return []
+        has_value = select(best.c.product_id).where(
+            best.c.product_id == Product.id, *(column.isnot(None) for column in order_columns)
+        ).exists()
+        rest = self._filter_search(select(Product.id), query, category_id).where(~has_value)
+        return list(await self.db.scalars(rest.order_by(Product.id).limit(limit)))
+    
+    async def _load_responses(self, product_ids: List[int]) -> List[ProductResponse]:
+        """Respuestas de `product_ids` en ese orden (2 consultas)"""
+        products = await self._load_products(product_ids)
+        return [self._build_product_response(products[product_id]) for product_id in product_ids]
+    
+    def _filter_search(self, q, query: Optional[str], category_id: Optional[int]):
+        """Agregar a `q` (SELECT sobre Product) los filtros de texto y categoría"""
+        if query and len(query.strip()) > 0:
+            q = q.where(self._text_filter(query))
+        if category_id:
+            q = q.where(Product.category_id == category_id)
+        return q
+    
+    def _text_filter(self, query: str):
+        """
+        Condición de búsqueda por texto sobre nombre o marca (no requiere JOIN
+        con Brand): Product.id IN (productos cuyo nombre coincide UNION
+        productos de las marcas que coinciden). Cada tabla se filtra sola, así
+        Postgres usa el índice GIN de cada una en vez de evaluar el OR fila
+        por fila sobre el JOIN.
+        Con SEARCH_BACKEND = "trigram" usa los índices GIN pg_trgm:
+        - LIKE '%texto%' sobre nombre/marca sin tildes (servido por el índice)
+        - word_similarity (<%) para tolerar errores de tipeo
+        """
+        if _search_backend() != "trigram":
+            name_match = Product.name.ilike(f"%{query}%")
+            brand_match = Brand.name.ilike(f"%{query}%")
+        else:
+            term = fold_search_text(query)
+            pattern = _like_pattern(term)
+            name_expr = _folded(Product.name)
+            brand_expr = _folded(Brand.name)
+            name_match = or_(name_expr.like(pattern, escape='!'), literal(term).op('<%')(name_expr))
+            brand_match = or_(brand_expr.like(pattern, escape='!'), literal(term).op('<%')(brand_expr))
+        
+        by_name = select(Product.id).where(name_match)
+        by_brand = select(Product.id).where(Product.brand_id.in_(select(Brand.id).where(brand_match)))
+        return Product.id.in_(union(by_name, by_brand))
+    
+    def _trigram_similarity(self, query: str):
+        """Mejor similitud entre el texto y el nombre o la marca (para ordenar)"""
+        term = fold_search_text(query)
+        return func.greatest(
+            func.word_similarity(term, _folded(Product.name)),
+            func.word_similarity(term, _folded(Brand.name))
+        )
+    
+    def _match_rank(self, query: str):
+        """
+        Relevancia aproximada sin pg_trgm (para ordenar los candidatos antes
+        del LIMIT): nombre exacto, nombre que empieza con el texto, alguna
+        palabra del nombre que empieza con el texto, marca que empieza con
+        el texto y, al final, el resto de las coincidencias
+        """
+        term = query.strip()
+        return case(
+            (func.lower(Product.name) == term.lower(), 0),
+            (Product.name.ilike(f"{term}%"), 1),
+            (Product.name.ilike(f"% {term}%"), 2),
+            (Brand.name.ilike(f"{term}%"), 3),
+            else_=4
+        )
+    
+    async def get_product_by_id(self, product_id: int) -> ProductResponse:
+        """Obtener producto por ID (con cache)"""
+        return await self._cached(("product", product_id), lambda: self._get_product_by_id(product_id))
+    
+    async def _get_product_by_id(self, product_id: int) -> ProductResponse:
+        products = await self._products(self._query_with_details().where(Product.id == product_id))
+        product = products[0] if products else None
         if not product:
             raise HTTPException(status_code=404, detail="Producto no encontrado")
         return self._build_product_response(product)
     
-    def list_products(self, skip: int, limit: int) -> List[ProductResponse]:
-        """Listar productos con paginación"""
-        products = self.db.query(Product).offset(skip).limit(limit).all()
+    async def get_products_by_ids(self, product_ids: List[int]) -> ProductBatchResponse:
+        """
+        Obtener varios productos por ID en orden de entrada.
+        Usa las mismas entradas de cache que get_product_by_id y carga todos
+        los faltantes con un número fijo de consultas.
+        """
+        product_ids = list(dict.fromkeys(product_ids))  # sin duplicados, mismo orden
+        generation = catalog_generation()
+        found: Dict[int, ProductResponse] = {}
+        
+        if settings.RESPONSE_CACHE_ENABLED:
+            for product_id in product_ids:
+                cached = response_cache.get(("product", product_id), generation)
+                if cached is not None:
+                    found[product_id] = cached
+        
+        pending = [product_id for product_id in product_ids if product_id not in found]
+        for product_id, product in (await self._load_products(pending)).items():
+            found[product_id] = self._build_product_response(product)
+            if settings.RESPONSE_CACHE_ENABLED:
+                response_cache.set(("product", product_id), found[product_id], generation)
+        
+        return ProductBatchResponse(
+            products=[found[product_id] for product_id in product_ids if product_id in found],
+            missing_ids=[product_id for product_id in product_ids if product_id not in found]
+        )
+    
+    async def list_products(self, skip: int, limit: int) -> List[ProductResponse]:
+        """Listar productos con paginación por offset (modo compatible)"""
+        return await self._cached(("list", skip, limit), lambda: self._list_products(skip, limit))
+    
+    async def _list_products(self, skip: int, limit: int) -> List[ProductResponse]:
+        products = await self._products(self._query_with_details().order_by(Product.id).offset(skip).limit(limit))
         return [self._build_product_response(p) for p in products]
     
-    def calculate_cart_totals(self, items: List[CartItem]) -> CartTotalsResponse:
-        """Calcular totales por tienda para una lista de compras"""
-        stores = self.db.query(Store).all()
-        totals = []
-        
-        for store in stores:
-            total = Decimal(0)
-            available = 0
-            unavailable = 0
-            
-            for item in items:
-                price_info = self.db.query(StorePrice).filter(
-                    StorePrice.product_id == item.product_id,
-                    StorePrice.store_id == store.id
-                ).first()
-                
-                if price_info and price_info.is_available:
-                    total += price_info.price * item.quantity
-                    available += 1
-                else:
-                    unavailable += 1
-            
-            totals.append(StoreTotalResponse(
-                store_id=store.id,
-                store_name=store.name,
-                total=total,
-                items_available=available,
-                items_unavailable=unavailable
+    async def list_products_page(self, cursor: str, limit: int) -> ProductPageResponse:
+        """
+        Listar productos con paginación por cursor (keyset sobre Product.id).
+        Cada página cuesta lo mismo sin importar su profundidad.
+        Un cursor vacío devuelve la primera página.
+        """
+        return await self._cached(("page", cursor, limit), lambda: self._list_products_page(cursor, limit))
+    
+    async def _list_products_page(self, cursor: str, limit: int) -> ProductPageResponse:
+        q = self._query_with_details()
+        
+        if cursor:
+            data = decode_cursor(cursor)
+            if not data or not isinstance(data.get("id"), int):
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+            q = q.where(Product.id > data["id"])
+        
+        # Pedimos uno extra para saber si existe una página siguiente
+        products = await self._products(q.order_by(Product.id).limit(limit + 1))
+        has_more = len(products) > limit
+        products = products[:limit]
+        
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor({"id": products[-1].id})
+        
+        return ProductPageResponse(
+            items=[self._build_product_response(p) for p in products],
+            next_cursor=next_cursor
+        )
+    
+    async def calculate_cart_totals(self, items: List[CartItem]) -> CartTotalsResponse:
+        """
+        Calcular totales por tienda para una lista de compras.
+        Con la matriz de precios en memoria vigente no hay consultas; si no,
+        2 consultas en total: tiendas y precios de todos los productos del carrito.
+        """
+        matrix = current_price_matrix()
+        if matrix is not None:
+            return matrix.cart_totals(items)
+        
+        stores = await fetch_stores_async(self.db)
+        prices = await fetch_price_map_async(self.db, (item.product_id for item in items))
+        return compute_cart_totals(stores, items, prices)
+    
+    async def calculate_cart_totals_batch(self, carts: List[List[CartItem]]) -> List[CartTotalsResponse]:
+        """
+        Calcular los totales de varios carritos a la vez (en el threadpool).
+        Una sola lectura de precios para la unión de productos y el mismo
+        cálculo que calculate_cart_totals para cada carrito.
+        """
+        matrix = current_price_matrix()
+        if matrix is not None:
+            return await run_in_threadpool(lambda: [matrix.cart_totals(items) for items in carts])
+        
+        stores = await fetch_stores_async(self.db)
+        prices = await fetch_price_map_async(self.db, (item.product_id for items in carts for item in items))
+        return await run_in_threadpool(lambda: [compute_cart_totals(stores, items, prices) for items in carts])
+    
+    async def optimize_cart(self, request: CartOptimizeRequest) -> CartOptimizeResponse:
+        """
+        Plan de compra más barato repartido en como máximo `max_stores` tiendas.
+        Usa los mismos datos de disponibilidad que calculate_cart_totals; el
+        optimizador corre en el threadpool.
+        """
+        stores = await fetch_stores_async(self.db)
+        prices = await fetch_price_map_async(self.db, (item.product_id for item in request.items))
+        return await run_in_threadpool(self._optimize, request, stores, prices)
+    
+    def _optimize(self, request: CartOptimizeRequest, stores: List[Tuple[int, str]],
+                  prices: PriceMap) -> CartOptimizeResponse:
+        """Resolver el plan y armar la respuesta (CPU pura, sin consultas)"""
+        store_names = dict(stores)
+        # Todo el cálculo en céntimos; Decimal solo en la respuesta
+        fixed_costs = {
+            store_id: to_cents(request.store_costs.get(store_id, request.store_cost))
+            for store_id, _ in stores
+        }
+        
+        plan = optimize_basket(stores, request.items, prices, request.max_stores,
+                               fixed_costs, request.mode)
+        
+        items = []
+        subtotals = {store_id: 0 for store_id in plan.store_ids}
+        items_count = {store_id: 0 for store_id in plan.store_ids}
+        for line, store_id in plan.assignments:
+            item = request.items[line]
+            unit_price = prices[item.product_id][store_id][0]
+            subtotal = unit_price * item.quantity
+            items.append(OptimizedItemResponse(
+                product_id=item.product_id,
+                quantity=item.quantity,
+                store_id=store_id,
+                store_name=store_names[store_id],
+                unit_price=cents_to_decimal(unit_price),
+                subtotal=cents_to_decimal(subtotal)
             ))
+            items_count[store_id] += 1
+            subtotals[store_id] += subtotal
+        
+        store_plans = [
+            StorePlanResponse(
+                store_id=store_id,
+                store_name=store_names[store_id],
+                items_count=items_count[store_id],
+                subtotal=cents_to_decimal(subtotals[store_id]),
+                fixed_cost=cents_to_decimal(fixed_costs[store_id])
+            )
+            for store_id in plan.store_ids
+        ]
         
-        totals.sort(key=lambda x: x.total)
-        return CartTotalsResponse(totals=totals)
+        return CartOptimizeResponse(
+            total=cents_to_decimal(plan.items_total + plan.fixed_total),
+            items_total=cents_to_decimal(plan.items_total),
+            fixed_costs_total=cents_to_decimal(plan.fixed_total),
+            stores=store_plans,
+            items=items,
+            unavailable_product_ids=[request.items[line].product_id for line in plan.unavailable],
+            method=plan.method
+        )
+    
+    def _query_with_details(self):
+        """
+        SELECT de productos con marca, categoría, precios y tiendas
+        cargados de antemano (evita una consulta por relación en
+        _build_product_response; con la sesión asíncrona no hay carga
+        diferida)
+        """
+        return select(Product).options(
+            joinedload(Product.brand),
+            joinedload(Product.category),
+            _load_prices()
+        )
     
-    def _build_product_response(self, product: Product) -> ProductResponse:
-        """Construir respuesta con precios de todas las tiendas"""
+    async def _products(self, stmt) -> List[Product]:
+        """Productos de un SELECT armado con _query_with_details"""
+        return list(await self.db.scalars(stmt))
+    
+    async def _load_products(self, product_ids: List[int]) -> Dict[int, Product]:
+        """Cargar varios productos con sus relaciones (2 consultas)"""
+        if not product_ids:
+            return {}
+        products = await self._products(self._query_with_details().where(Product.id.in_(product_ids)))
+        return {p.id: p for p in products}
+    
+    def _build_product_response(self, product: Product, score: Optional[float] = None) -> ProductResponse:
+        """
+        Construir respuesta con precios de todas las tiendas
+        El producto debe venir de una consulta con las relaciones precargadas
+        """
         prices = []
         for sp in product.prices:
             prices.append(PriceInfo(
                 store_id=sp.store_id,
                 store_name=sp.store.name,
                 price=sp.price,
+                unit_price=sp.unit_price,
                 url=sp.url,
                 is_available=sp.is_available
             ))
@@ -103,5 +666,8 @@ class ProductService:
             brand_name=product.brand.name,
             category_name=product.category.name,
             image_url=product.image_url,
-            prices=prices
+            unit_quantity=product.unit_quantity,
+            unit=product.unit,
+            prices=prices,
+            score=score
         )
\ No newline at end of file
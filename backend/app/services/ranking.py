@@ -0,0 +1,107 @@
+"""
+Ranking de resultados de búsqueda con BM25
+Los campos se ponderan (nombre > marca > categoría) y los términos se comparan
+por subcadena, igual que la búsqueda, con más peso para coincidencias exactas
+"""
+
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Parámetros estándar de BM25
+K1 = 1.2
+B = 0.75
+
+# Peso de cada campo en la frecuencia del término
+FIELD_WEIGHTS = {
+    "name": 1.0,
+    "brand": 0.8,
+    "category": 0.4,
+}
+
+# Peso según el tipo de coincidencia del término con el token
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+SUBSTRING_MATCH = 0.4
+
+
+class RankDocument(NamedTuple):
+    item: Any
+    fields: Dict[str, List[str]]  # campo -> tokens normalizados
+
+
+def _match_weight(term: str, token: str) -> float:
+    if token == term:
+        return EXACT_MATCH
+    if token.startswith(term):
+        return PREFIX_MATCH
+    if term in token:
+        return SUBSTRING_MATCH
+    return 0.0
+
+
+def _term_frequency(term: str, fields: Dict[str, List[str]]) -> float:
+    """Frecuencia ponderada del término en todos los campos del documento"""
+    tf = 0.0
+    for field, tokens in fields.items():
+        weight = FIELD_WEIGHTS.get(field, 1.0)
+        for token in tokens:
+            tf += weight * _match_weight(term, token)
+    return tf
+
+
+def _idf(doc_freq: int, total_docs: int) -> float:
+    return math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def bm25_top_k(
+    terms: Sequence[str],
+    documents: Iterable[RankDocument],
+    k: int,
+    doc_freq: Optional[Dict[str, int]] = None,
+    total_docs: Optional[int] = None,
+) -> List[Tuple[float, Any]]:
+    """
+    Retornar los `k` documentos con mayor puntaje BM25, de mayor a menor.
+
+    Usa un heap acotado a `k` elementos: ordenar N candidatos cuesta
+    O(N log k) en lugar de O(N log N). Ante empates se conserva el orden
+    de entrada.
+
+    Si no se entregan `doc_freq` y `total_docs` (estadísticas del corpus),
+    se calculan sobre los propios candidatos.
+    """
+    terms = list(dict.fromkeys(terms))
+    docs = documents if isinstance(documents, list) else list(documents)
+    if not docs or k <= 0:
+        return []
+
+    lengths = [sum(len(tokens) for tokens in doc.fields.values()) or 1 for doc in docs]
+    avg_length = sum(lengths) / len(lengths)
+
+    # Frecuencias por documento (se reutilizan para doc_freq si hace falta)
+    frequencies = [[_term_frequency(term, doc.fields) for term in terms] for doc in docs]
+
+    if doc_freq is None or total_docs is None:
+        total_docs = len(docs)
+        doc_freq = {
+            term: sum(1 for tfs in frequencies if tfs[i] > 0)
+            for i, term in enumerate(terms)
+        }
+
+    idfs = [_idf(doc_freq.get(term, 0), total_docs) for term in terms]
+
+    heap: List[Tuple[float, int, Any]] = []
+    for position, (doc, tfs, length) in enumerate(zip(docs, frequencies, lengths)):
+        norm = K1 * (1 - B + B * length / avg_length)
+        score = sum(
+            idf * tf * (K1 + 1) / (tf + norm)
+            for idf, tf in zip(idfs, tfs) if tf > 0
+        )
+        entry = (score, -position, doc.item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    return [(score, item) for score, _, item in sorted(heap, key=lambda e: e[:2], reverse=True)]
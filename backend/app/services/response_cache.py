@@ -0,0 +1,111 @@
+"""
+Cache en memoria para respuestas del catálogo (búsqueda, detalle y listado)
+LRU con expiración por tiempo e invalidación por generación del catálogo
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from app.config import settings
+from app.services.catalog_version import catalog_generation
+
+
+class ResponseCache:
+    """
+    Cache LRU + TTL.
+    Cada entrada guarda la generación del catálogo con la que se calculó;
+    si la generación cambió (hubo un ingest, en este u otro proceso: ver
+    catalog_version) la entrada se descarta. El TTL es solo un respaldo por
+    si catalog_version no se puede leer.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: Optional[int] = None) -> Optional[Any]:
+        """Valor vigente para `key` o None (cuenta como acierto/fallo)"""
+        if generation is None:
+            generation = catalog_generation()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, value = entry
+                if entry_generation == generation and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, generation: int):
+        """Guardar un valor calculado con la generación `generation`"""
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Retornar el valor cacheado o calcularlo y guardarlo"""
+        # La generación se toma ANTES de calcular: si un ingest ocurre
+        # mientras tanto, la entrada queda marcada como vieja
+        generation = catalog_generation()
+
+        value = self.get(key, generation)
+        if value is not None:
+            return value
+
+        # Se calcula fuera del lock
+        value = compute()
+        self.set(key, value, generation)
+        return value
+
+    async def get_or_set_async(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_set con un cálculo asíncrono (`await compute()`)"""
+        generation = catalog_generation()
+
+        value = self.get(key, generation)
+        if value is not None:
+            return value
+
+        value = await compute()
+        self.set(key, value, generation)
+        return value
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos y fallos"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "generation": catalog_generation(),
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
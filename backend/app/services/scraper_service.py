@@ -4,10 +4,17 @@ from app.scrapers.plaza_vea_scraper import PlazaVeaScraper
 from app.scrapers.makro_scraper import MakroScraper
 from app.models import Product, Brand, Category, StorePrice
 from app.models.store import Store
+from app.services.index_holder import rebuild_active_indexes
+from app.services.catalog_version import bump_catalog_generation
+from app.services.price_history import PriceHistoryRecorder
+from app.services.best_prices import refresh_best_prices
+from app.utils.helpers import parse_quantity, compute_unit_price
+from app.utils.money import to_cents, cents_to_decimal
 
 class ScraperService:
     def __init__(self, db: Session):
         self.db = db
+        self.history = PriceHistoryRecorder(db)
         self.scrapers = {
             'Plaza Vea': PlazaVeaScraper(),
             'Makro': MakroScraper()
@@ -51,6 +58,12 @@ class ScraperService:
                     print(f"❌ Error en {url}: {e}")
                     import traceback
                     traceback.print_exc()
+        
+        # Mejor precio por producto (vista materializada)
+        refresh_best_prices(self.db)
+        
+        # Reconstruir índices en memoria (si este proceso los usa)
+        rebuild_active_indexes()
     
     def _get_or_create_store(self, store_name: str) -> Store:
         """
@@ -139,12 +152,16 @@ class ScraperService:
                 category_id=category.id,
                 image_url=image_url
             )
+            product.unit_quantity, product.unit = parse_quantity(product.name) or (None, None)
             self.db.add(product)
             self.db.flush()
         else:
             # Actualizar imagen si no tiene o si cambió
             if image_url and not product.image_url:
                 product.image_url = image_url
+            # Productos anteriores a la columna unit_quantity
+            if product.unit is None:
+                product.unit_quantity, product.unit = parse_quantity(product.name) or (None, None)
         
         return product
     
@@ -160,7 +177,8 @@ class ScraperService:
             try:
                 # Validar datos mínimos
                 product_name = data.get('name', '').strip()
-                price_value = data.get('price', 0.0)
+                # El scraper retorna float: se redondea a céntimos una sola vez
+                price_value = cents_to_decimal(to_cents(data.get('price', 0.0)))
                 
                 if not product_name:
                     continue
@@ -192,9 +210,14 @@ class ScraperService:
                     StorePrice.store_id == store_id
                 ).first()
                 
+                unit_price = compute_unit_price(price_value, product.unit_quantity)
+                # Fila de historial (solo si cambió), antes de modificar el precio
+                history_row = self.history.change(store_price, product.id, store_id, price_value, True)
+                
                 if store_price:
                     # ACTUALIZAR precio existente
                     store_price.price = price_value
+                    store_price.unit_price = unit_price
                     store_price.url = data.get('url')
                     store_price.is_available = True
                 else:
@@ -203,6 +226,7 @@ class ScraperService:
                         product_id=product.id,
                         store_id=store_id,
                         price=price_value,
+                        unit_price=unit_price,
                         url=data.get('url'),
                         is_available=True
                     )
@@ -212,6 +236,7 @@ class ScraperService:
                 try:
                     self.db.commit()
                     saved_count += 1
+                    self.history.add(history_row)
                 except Exception as commit_error:
                     # Si falla el commit (ej: duplicado), hacer rollback y continuar
                     self.db.rollback()
@@ -231,6 +256,13 @@ class ScraperService:
         if errors_count > 0:
             print(f"   ⚠️  {errors_count} productos con errores (omitidos)")
         
+        # Historial de precios pendiente (INSERT por lotes)
+        self.history.flush()
+        
+        # Invalidar caches del catálogo (los cambios ya están confirmados)
+        if saved_count > 0:
+            bump_catalog_generation(self.db)
+        
         return saved_count
     
     def mark_unavailable_products(self, store_id: int, available_product_ids: List[int]):
@@ -239,6 +271,10 @@ class ScraperService:
         Útil después de un scraping completo
         """
         try:
+            # Historial de los que pasan a no disponibles (misma transacción,
+            # en un savepoint: si falla, el UPDATE se hace igual)
+            self.history.record_unavailable(store_id, available_product_ids)
+            
             # Marcar como no disponibles todos los productos que NO están en la lista
             self.db.query(StorePrice).filter(
                 StorePrice.store_id == store_id,
@@ -248,6 +284,7 @@ class ScraperService:
             }, synchronize_session=False)
             
             self.db.commit()
+            bump_catalog_generation(self.db)
             print(f"✓ Productos no encontrados marcados como no disponibles")
         except Exception as e:
             print(f"⚠️  Error marcando productos no disponibles: {e}")
@@ -0,0 +1,298 @@
+"""
+Motor de búsqueda en memoria (índice invertido de tokens y trigramas)
+Responde /api/products/search sin consultar PostgreSQL
+"""
+
+import re
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, TypeVar
+from sqlalchemy.orm import Session
+from app.models import Product, Brand, Category, StorePrice
+from app.models.store import Store
+from app.schemas.product import ProductResponse, PriceInfo, FacetCount, SearchFacetsResponse
+from app.services.index_holder import IndexHolder
+from app.services.ranking import RankDocument, bm25_top_k
+from app.utils.helpers import fold_search_text
+
+_TOKEN_RE = re.compile(r"\w+")
+GRAM_SIZE = 3
+
+T = TypeVar("T")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens sin tildes y en minúsculas"""
+    return _TOKEN_RE.findall(fold_search_text(text))
+
+
+def _grams(token: str) -> Set[str]:
+    return {token[i:i + GRAM_SIZE] for i in range(len(token) - GRAM_SIZE + 1)}
+
+
+class IndexedProduct(NamedTuple):
+    product_id: int
+    brand_id: int
+    category_id: int
+    name_tokens: List[str]
+    brand_tokens: List[str]
+    category_tokens: List[str]
+    response: ProductResponse
+
+
+class SearchIndex:
+    """
+    Índice inmutable sobre nombre, marca y categoría de cada producto.
+    - token -> documentos que lo contienen
+    - trigrama -> tokens del vocabulario que lo contienen (búsqueda parcial)
+    Un término coincide con todo token que lo contenga como subcadena,
+    igual que el '%texto%' de la búsqueda en base de datos.
+    """
+
+    def __init__(self, docs: List[IndexedProduct]):
+        self.docs = docs
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+        self._by_category: Dict[int, List[int]] = defaultdict(list)
+
+        for doc_id, doc in enumerate(docs):
+            self._by_category[doc.category_id].append(doc_id)
+            tokens = set(doc.name_tokens) | set(doc.brand_tokens) | set(doc.category_tokens)
+            for token in tokens:
+                self._postings[token].append(doc_id)
+
+        for token in self._postings:
+            for gram in _grams(token):
+                self._grams[gram].add(token)
+
+        self._vocabulary = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _matching_tokens(self, term: str) -> Set[str]:
+        """Tokens del vocabulario que contienen `term`"""
+        if len(term) < GRAM_SIZE:
+            # Términos cortos: coincidencia por prefijo sobre el vocabulario ordenado
+            start = bisect_left(self._vocabulary, term)
+            matches = set()
+            for token in self._vocabulary[start:]:
+                if not token.startswith(term):
+                    break
+                matches.add(token)
+            return matches
+
+        grams = sorted(_grams(term), key=lambda g: len(self._grams.get(g, ())))
+        candidates = set(self._grams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._grams.get(gram, set())
+        return {token for token in candidates if term in token}
+
+    def _term_docs(self, term: str) -> Set[int]:
+        """Documentos con algún token que contenga `term`"""
+        docs: Set[int] = set()
+        for token in self._matching_tokens(term):
+            docs.update(self._postings[token])
+        return docs
+
+    def match(self, query: Optional[str] = None, category_id: Optional[int] = None) -> List[int]:
+        """IDs de documento (ordenados) que contienen todos los términos"""
+        return sorted(self._match(tokenize(query or ""), category_id)[0])
+
+    def _match(self, terms: List[str], category_id: Optional[int]) -> Tuple[Set[int], Dict[str, int]]:
+        """Documentos que coinciden y frecuencia documental de cada término"""
+        result: Optional[Set[int]] = None
+        doc_freq: Dict[str, int] = {}
+
+        for term in sorted(set(terms), key=len, reverse=True):
+            docs = self._term_docs(term)
+            doc_freq[term] = len(docs)
+            result = docs if result is None else result & docs
+            if not result:
+                return set(), doc_freq
+
+        if category_id:
+            category_docs = set(self._by_category.get(category_id, ()))
+            result = category_docs if result is None else result & category_docs
+
+        return result or set(), doc_freq
+
+    def search(self, query: Optional[str] = None, category_id: Optional[int] = None,
+               limit: int = 50, sort: str = "relevance") -> List[ProductResponse]:
+        """
+        Buscar productos con la misma interfaz que ProductService.search_products.
+        Con texto, los resultados se ordenan por BM25 con estadísticas de todo
+        el catálogo; solo por categoría, por ID. Con sort="unit_price", los
+        más baratos por kg / l / unidad de cada unidad (ver page_by_unit; sin
+        precio unitario al final) y con sort="price", por el menor precio
+        disponible.
+        """
+        terms = tokenize(query or "")
+        doc_ids, doc_freq = self._match(terms, category_id)
+
+        if sort == "unit_price":
+            return [self.docs[doc_id].response for doc_id in self._by_unit_price(doc_ids, limit)]
+        if sort == "price":
+            return [
+                self.docs[doc_id].response
+                for doc_id in heapq.nsmallest(limit, doc_ids, key=self._price_key)
+            ]
+
+        if not terms:
+            return [self.docs[doc_id].response for doc_id in sorted(doc_ids)[:limit]]
+
+        ranked = bm25_top_k(
+            terms,
+            [
+                RankDocument(doc_id, {
+                    "name": self.docs[doc_id].name_tokens,
+                    "brand": self.docs[doc_id].brand_tokens,
+                    "category": self.docs[doc_id].category_tokens,
+                })
+                for doc_id in sorted(doc_ids)
+            ],
+            k=limit,
+            doc_freq=doc_freq,
+            total_docs=len(self.docs)
+        )
+        return [
+            self.docs[doc_id].response.model_copy(update={"score": round(score, 4)})
+            for score, doc_id in ranked
+        ]
+
+    def _by_unit_price(self, doc_ids: Set[int], limit: int) -> List[int]:
+        """Los `limit` más baratos de cada unidad repartidos con page_by_unit y luego los sin precio unitario"""
+        by_unit: Dict[str, List[Tuple]] = defaultdict(list)
+        without_price = []
+        for doc_id in doc_ids:
+            response = self.docs[doc_id].response
+            unit_prices = [
+                p.unit_price for p in response.prices
+                if p.is_available and p.unit_price is not None
+            ]
+            if unit_prices and response.unit is not None:
+                by_unit[response.unit].append((min(unit_prices), doc_id))
+            else:
+                without_price.append(doc_id)
+
+        groups = {
+            unit: [doc_id for _, doc_id in heapq.nsmallest(limit, keys)]
+            for unit, keys in by_unit.items()
+        }
+        page = page_by_unit(groups, limit)
+        return page + heapq.nsmallest(limit - len(page), without_price)
+
+    def _price_key(self, doc_id: int):
+        """Orden por menor precio disponible, luego por ID (igual que product_best_prices)"""
+        prices = [p.price for p in self.docs[doc_id].response.prices if p.is_available]
+        return (0, min(prices), doc_id) if prices else (1, 0, doc_id)
+
+    def facets(self, query: Optional[str] = None, category_id: Optional[int] = None) -> SearchFacetsResponse:
+        """Conteos por categoría, marca y tienda en una sola pasada por los resultados"""
+        doc_ids, _ = self._match(tokenize(query or ""), category_id)
+
+        categories: Dict[int, FacetCount] = {}
+        brands: Dict[int, FacetCount] = {}
+        stores: Dict[int, FacetCount] = {}
+
+        def add(counts: Dict[int, FacetCount], facet_id: int, name: str):
+            if facet_id in counts:
+                counts[facet_id].count += 1
+            else:
+                counts[facet_id] = FacetCount(id=facet_id, name=name, count=1)
+
+        for doc_id in doc_ids:
+            doc = self.docs[doc_id]
+            add(categories, doc.category_id, doc.response.category_name)
+            add(brands, doc.brand_id, doc.response.brand_name)
+            for store_id, store_name in {
+                (p.store_id, p.store_name) for p in doc.response.prices if p.is_available
+            }:
+                add(stores, store_id, store_name)
+
+        return SearchFacetsResponse(
+            categories=sort_facets(categories.values()),
+            brands=sort_facets(brands.values()),
+            stores=sort_facets(stores.values())
+        )
+
+
+def sort_facets(facets: Iterable[FacetCount]) -> List[FacetCount]:
+    """Más frecuentes primero; a igual conteo, por nombre"""
+    return sorted(facets, key=lambda f: (-f.count, f.name))
+
+
+def page_by_unit(groups: Dict[str, List[T]], limit: int) -> List[T]:
+    """
+    Página de sort=unit_price a partir de los más baratos de cada unidad
+    (un precio por kg no se compara con uno por litro). Los `limit`
+    lugares se reparten en partes iguales entre las unidades con
+    resultados; los que una unidad no llena pasan a las demás. Quedan
+    agrupados por unidad, en orden alfabético
+    """
+    shares: Dict[str, int] = {}
+    remaining = limit
+    pending = sorted(groups, key=lambda unit: (len(groups[unit]), unit))
+    for position, unit in enumerate(pending):
+        shares[unit] = min(len(groups[unit]), remaining // (len(pending) - position))
+        remaining -= shares[unit]
+    return [item for unit in sorted(groups) for item in groups[unit][:shares[unit]]]
+
+
+def build_search_index(db: Session) -> SearchIndex:
+    """
+    Construir el índice con dos consultas: productos (con marca y categoría)
+    y precios (con nombre de tienda)
+    """
+    prices: Dict[int, List[PriceInfo]] = defaultdict(list)
+    price_rows = db.query(
+        StorePrice.product_id, StorePrice.store_id, Store.name,
+        StorePrice.price, StorePrice.unit_price, StorePrice.url, StorePrice.is_available
+    ).join(Store, Store.id == StorePrice.store_id).order_by(StorePrice.id)
+
+    for product_id, store_id, store_name, price, unit_price, url, is_available in price_rows:
+        prices[product_id].append(PriceInfo(
+            store_id=store_id,
+            store_name=store_name,
+            price=price,
+            unit_price=unit_price,
+            url=url,
+            is_available=is_available
+        ))
+
+    product_rows = db.query(
+        Product.id, Product.name, Product.brand_id, Product.category_id, Product.image_url,
+        Product.unit_quantity, Product.unit, Brand.name, Category.name
+    ).join(Brand, Brand.id == Product.brand_id).join(
+        Category, Category.id == Product.category_id
+    ).order_by(Product.id)
+
+    docs = []
+    for (product_id, name, brand_id, category_id, image_url, unit_quantity, unit,
+         brand_name, category_name) in product_rows:
+        docs.append(IndexedProduct(
+            product_id=product_id,
+            brand_id=brand_id,
+            category_id=category_id,
+            name_tokens=tokenize(name),
+            brand_tokens=tokenize(brand_name),
+            category_tokens=tokenize(category_name),
+            response=ProductResponse(
+                id=product_id,
+                name=name,
+                brand_name=brand_name,
+                category_name=category_name,
+                image_url=image_url,
+                unit_quantity=unit_quantity,
+                unit=unit,
+                prices=prices.get(product_id, [])
+            )
+        ))
+
+    return SearchIndex(docs)
+
+
+search_index: IndexHolder[SearchIndex] = IndexHolder("search", build_search_index)
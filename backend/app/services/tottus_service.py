@@ -1,9 +1,12 @@
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from difflib import SequenceMatcher
-import unicodedata
 import re
 from app.models import Product, Brand, Category, StorePrice, Store
+from app.services.catalog_version import bump_catalog_generation
+from app.services.price_history import PriceHistoryRecorder
+from app.utils.helpers import strip_accents, parse_quantity, compute_unit_price
+from app.utils.money import to_cents, cents_to_decimal
 
 
 class TottusDataService:
@@ -14,6 +17,7 @@ class TottusDataService:
     
     def __init__(self, db: Session):
         self.db = db
+        self.history = PriceHistoryRecorder(db)
         
         # Cache de categorías existentes
         self.existing_categories = {
@@ -34,9 +38,7 @@ class TottusDataService:
         if not text:
             return ""
         
-        text = str(text).strip()
-        text = unicodedata.normalize('NFD', text)
-        text = ''.join(char for char in text if unicodedata.category(char) != 'Mn')
+        text = strip_accents(str(text).strip())
         text = ' '.join(text.split())
         
         return text
@@ -183,7 +185,8 @@ class TottusDataService:
             try:
                 # Validar datos mínimos
                 full_name = data.get('name', '').strip()
-                price_value = data.get('price', 0.0)
+                # El scraper retorna float: se redondea a céntimos una sola vez
+                price_value = cents_to_decimal(to_cents(data.get('price', 0.0)))
                 
                 if not full_name or price_value <= 0:
                     continue
@@ -229,6 +232,7 @@ class TottusDataService:
                         category_id=category.id,
                         image_url=data.get('image_url')
                     )
+                    product.unit_quantity, product.unit = parse_quantity(product.name) or (None, None)
                     self.db.add(product)
                     self.db.flush()
                     saved_count += 1
@@ -236,6 +240,8 @@ class TottusDataService:
                     # Actualizar imagen si no tiene
                     if data.get('image_url') and not product.image_url:
                         product.image_url = data.get('image_url')
+                    if product.unit is None:
+                        product.unit_quantity, product.unit = parse_quantity(product.name) or (None, None)
                     updated_count += 1
                 
                 # 4. Actualizar o crear PRECIO en Tottus
@@ -244,9 +250,14 @@ class TottusDataService:
                     StorePrice.store_id == store_id
                 ).first()
                 
+                unit_price = compute_unit_price(price_value, product.unit_quantity)
+                # Fila de historial (solo si cambió), antes de modificar el precio
+                history_row = self.history.change(store_price, product.id, store_id, price_value, True)
+                
                 if store_price:
                     # Actualizar precio existente
                     store_price.price = price_value
+                    store_price.unit_price = unit_price
                     store_price.url = data.get('url')
                     store_price.is_available = True
                 else:
@@ -255,6 +266,7 @@ class TottusDataService:
                         product_id=product.id,
                         store_id=store_id,
                         price=price_value,
+                        unit_price=unit_price,
                         url=data.get('url'),
                         is_available=True
                     )
@@ -263,6 +275,7 @@ class TottusDataService:
                 # Commit individual
                 try:
                     self.db.commit()
+                    self.history.add(history_row)
                 except Exception as commit_error:
                     self.db.rollback()
                     errors_count += 1
@@ -275,6 +288,13 @@ class TottusDataService:
                 self.db.rollback()
                 continue
         
+        # Historial de precios pendiente (INSERT por lotes)
+        self.history.flush()
+        
+        # Invalidar caches del catálogo (los cambios ya están confirmados)
+        if saved_count + updated_count > 0:
+            bump_catalog_generation(self.db)
+        
         print(f"\n✅ Proceso completado:")
         print(f"   • Productos nuevos: {saved_count}")
         print(f"   • Productos actualizados: {updated_count}")
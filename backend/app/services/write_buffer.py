@@ -0,0 +1,156 @@
+"""
+Buffer de escritura diferida (write-behind)
+Las filas se aceptan en memoria y un hilo las escribe por lotes, cuando se
+junta `batch_size` o pasan `flush_seconds`, con una sola sesión por lote
+"""
+
+import threading
+import traceback
+from collections import deque
+from typing import Callable, Deque, List, Optional
+from sqlalchemy.orm import Session
+from app.database.session import SessionLocal
+
+
+class WriteBehindBuffer:
+    """
+    Cola acotada de filas pendientes de escribir.
+    - add() no toca la base de datos; retorna False si la cola está llena
+      (el llamador decide si escribir de forma síncrona)
+    - Si un lote falla se reintenta (antes que el resto de la cola) hasta
+      `max_attempts` veces; después se escribe fila por fila y las filas
+      que siguen fallando se descartan con un aviso, así un registro
+      inválido no bloquea a los que vienen detrás
+    - stop() escribe lo pendiente antes de terminar
+    """
+
+    def __init__(self, name: str, writer: Callable[[Session, List[dict]], None],
+                 batch_size: int = 100, flush_seconds: float = 2.0, max_pending: int = 10000,
+                 max_attempts: int = 3):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._writer = writer
+        self._pending: Deque[dict] = deque()
+        # Lote que falló y cuántas veces se intentó
+        self._retry: List[dict] = []
+        self._retry_attempts = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+        self.written = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._retry)
+
+    def add(self, row: dict) -> bool:
+        """Encolar una fila; despierta al hilo si ya hay un lote completo"""
+        with self._lock:
+            if len(self) >= self.max_pending:
+                return False
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        self.start()
+        if full:
+            self._wakeup.set()
+        return True
+
+    def start(self):
+        """Iniciar el hilo de escritura (si no está corriendo)"""
+        with self._lock:
+            if self._stopping or (self._worker and self._worker.is_alive()):
+                return
+            self._worker = threading.Thread(target=self._run, name=f"write-{self.name}", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Detener el hilo y escribir todas las filas pendientes"""
+        with self._lock:
+            self._stopping = True
+            worker = self._worker
+        self._wakeup.set()
+        if worker:
+            worker.join(timeout)
+        # Lo que el hilo no alcanzó a escribir (termina: cada fallo suma un
+        # intento y al llegar a max_attempts las filas se escriben o descartan)
+        while len(self):
+            self.flush()
+
+    def flush(self) -> bool:
+        """Escribir un lote (primero el que falló, si hay); retorna False si falló"""
+        with self._flush_lock:
+            with self._lock:
+                if self._retry:
+                    batch, attempts = self._retry, self._retry_attempts
+                    self._retry = []
+                else:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                    attempts = 0
+            if not batch:
+                return True
+
+            if attempts >= self.max_attempts:
+                self._write_one_by_one(batch)
+                return True
+
+            db = SessionLocal()
+            try:
+                self._writer(db, batch)
+                db.commit()
+                self.written += len(batch)
+                return True
+            except Exception as e:
+                db.rollback()
+                self.failed_flushes += 1
+                with self._lock:
+                    self._retry = batch
+                    self._retry_attempts = attempts + 1
+                print(f"⚠️  Error escribiendo lote '{self.name}' ({len(batch)} filas, "
+                      f"intento {attempts + 1}/{self.max_attempts}): {e}")
+                traceback.print_exc()
+                return False
+            finally:
+                db.close()
+
+    def _write_one_by_one(self, batch: List[dict]):
+        """Último recurso para un lote que falló max_attempts veces"""
+        db = SessionLocal()
+        try:
+            for row in batch:
+                try:
+                    self._writer(db, [row])
+                    db.commit()
+                    self.written += 1
+                except Exception as e:
+                    db.rollback()
+                    self.dropped += 1
+                    print(f"❌ Fila descartada en '{self.name}' tras {self.max_attempts} intentos: {e}")
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            # Vaciar mientras haya lotes completos (o todo, al detenerse)
+            while len(self):
+                if not self.flush():
+                    break
+                if len(self) < self.batch_size and not self._stopping:
+                    break
+            if self._stopping:
+                return
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self),
+            "written": self.written,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+        }
@@ -3,8 +3,11 @@ Funciones de utilidad para el proyecto
 """
 
 import re
-from decimal import Decimal
-from typing import Optional
+import json
+import base64
+import unicodedata
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Tuple
 
 
 def parse_price(price_text: str) -> float:
@@ -62,6 +65,29 @@ def normalize_product_name(name: str) -> str:
     return name
 
 
+def strip_accents(text: str) -> str:
+    """
+    Eliminar tildes usando descomposición NFD
+    Ejemplo: 'Azúcar Rubia' -> 'Azucar Rubia'
+    """
+    if not text:
+        return ""
+    
+    text = unicodedata.normalize('NFD', str(text))
+    return ''.join(char for char in text if unicodedata.category(char) != 'Mn')
+
+
+def fold_search_text(text: str) -> str:
+    """
+    Normalizar texto para búsqueda: sin tildes, minúsculas y espacios simples
+    Debe coincidir con f_unaccent(lower(...)) en PostgreSQL
+    """
+    if not text:
+        return ""
+    
+    return ' '.join(strip_accents(text).lower().split())
+
+
 def format_currency(amount: Decimal) -> str:
     """
     Formatear cantidad como moneda peruana
@@ -85,6 +111,77 @@ def extract_unit_from_text(text: str) -> str:
     return 'unidad'
 
 
+# Unidad escrita -> (unidad normalizada, factor a la unidad normalizada)
+_UNIT_FACTORS = {
+    'kg': ('kg', Decimal(1)), 'kgs': ('kg', Decimal(1)),
+    'kilo': ('kg', Decimal(1)), 'kilos': ('kg', Decimal(1)),
+    'g': ('kg', Decimal('0.001')), 'gr': ('kg', Decimal('0.001')),
+    'grs': ('kg', Decimal('0.001')), 'gramos': ('kg', Decimal('0.001')),
+    'l': ('l', Decimal(1)), 'lt': ('l', Decimal(1)), 'lts': ('l', Decimal(1)),
+    'litro': ('l', Decimal(1)), 'litros': ('l', Decimal(1)),
+    'ml': ('l', Decimal('0.001')), 'cc': ('l', Decimal('0.001')),
+    'un': ('un', Decimal(1)), 'und': ('un', Decimal(1)), 'unid': ('un', Decimal(1)),
+    'unidad': ('un', Decimal(1)), 'unidades': ('un', Decimal(1)),
+}
+
+# Unidades de products.unit y de los precios unitarios
+NORMALIZED_UNITS = tuple(sorted({unit for unit, _ in _UNIT_FACTORS.values()}))
+
+_NUMBER = r'(?<![\w.,])(\d+(?:[.,]\d+)?)'
+_UNIT = r'(' + '|'.join(sorted(_UNIT_FACTORS, key=len, reverse=True)) + r')\b'
+
+# "Pack 6 x 400ml", "6x1 L"
+_PACK_RE = re.compile(_NUMBER + r'\s*x\s*(\d+(?:[.,]\d+)?)\s*' + _UNIT)
+# "Gaseosa 355 ml x 6", "Yogurt 1kg x 2"
+_PACK_AFTER_RE = re.compile(_NUMBER + r'\s*' + _UNIT + r'\s*x\s*(\d+)\b')
+# "Bolsa 5 Kg", "Aceite 900ml", "Huevos 15 un"
+_SIZE_RE = re.compile(_NUMBER + r'\s*' + _UNIT)
+
+
+def parse_quantity(text: str) -> Optional[Tuple[Decimal, str]]:
+    """
+    Extraer el contenido total del nombre de un producto, normalizado a
+    kilos ('kg'), litros ('l') o unidades ('un')
+    Ejemplos: 'Bolsa 5 Kg' -> (5, 'kg'), 'Pack 6 x 400ml' -> (2.4, 'l')
+    Retorna None si el nombre no indica cantidad
+    """
+    if not text:
+        return None
+    
+    text = strip_accents(text).lower()
+    
+    match = _PACK_RE.search(text)
+    if match:
+        count, size, unit = match.groups()
+    else:
+        match = _PACK_AFTER_RE.search(text)
+        if match:
+            size, unit, count = match.groups()
+        else:
+            match = _SIZE_RE.search(text)
+            if not match:
+                return None
+            size, unit = match.groups()
+            count = '1'
+    
+    normalized, factor = _UNIT_FACTORS[unit]
+    quantity = Decimal(count.replace(',', '.')) * Decimal(size.replace(',', '.')) * factor
+    if quantity <= 0:
+        return None
+    return quantity.quantize(Decimal('0.001')), normalized
+
+
+def compute_unit_price(price, quantity: Optional[Decimal]) -> Optional[Decimal]:
+    """
+    Precio por kilo, litro o unidad redondeado a céntimos
+    (mismo redondeo que round(numeric, 2) en PostgreSQL)
+    """
+    if price is None or not quantity:
+        return None
+    unit_price = Decimal(str(price)) / Decimal(quantity)
+    return unit_price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
 def sanitize_url(url: str) -> Optional[str]:
     """
     Validar y limpiar URL
@@ -96,4 +193,25 @@ def sanitize_url(url: str) -> Optional[str]:
     if not url.startswith('http'):
         url = 'https://' + url
     
-    return url.strip()
\ No newline at end of file
+    return url.strip()
+
+
+def encode_cursor(data: dict) -> str:
+    """
+    Codificar un cursor de paginación opaco (JSON en base64 url-safe)
+    """
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[dict]:
+    """
+    Decodificar un cursor generado por encode_cursor
+    Retorna None si el cursor no es válido
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return data if isinstance(data, dict) else None
@@ -0,0 +1,23 @@
+"""
+Conversión de montos entre Decimal (API / base de datos) y céntimos enteros
+"""
+
+from decimal import Decimal
+
+
+def to_cents(amount) -> int:
+    """
+    Convertir un monto en soles a céntimos enteros
+    Ejemplos: Decimal('15.90') -> 1590, 15.9 -> 1590
+    """
+    if isinstance(amount, Decimal):
+        return int(amount.scaleb(2).to_integral_value())
+    return int(round(float(amount) * 100))
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """
+    Convertir céntimos a Decimal con 2 decimales
+    Ejemplo: 1590 -> Decimal('15.90')
+    """
+    return Decimal(int(cents)).scaleb(-2)
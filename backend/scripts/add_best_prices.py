@@ -0,0 +1,111 @@
+"""
+Script para crear la vista materializada product_best_prices en Supabase
+Mejor precio disponible por producto (precio mínimo, tienda más barata,
+cantidad de tiendas, diferencia entre el precio más alto y el más bajo y
+menor precio por kg / l / unidad con la unidad del producto).
+Los ingest la refrescan con REFRESH MATERIALIZED VIEW CONCURRENTLY
+Ejecutar UNA SOLA VEZ; es seguro volver a ejecutarlo (una vista creada
+por una versión anterior, sin min_unit_price, se vuelve a crear)
+"""
+
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.database.session import engine
+from sqlalchemy import text
+
+
+def drop_outdated_view(conn):
+    """Borrar la vista si le faltan columnas (creada por una versión anterior)"""
+    current = conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_attribute
+            WHERE attrelid = to_regclass('product_best_prices') AND attname = 'min_unit_price'
+        ) OR to_regclass('product_best_prices') IS NULL
+    """)).scalar()
+    if not current:
+        conn.execute(text("DROP MATERIALIZED VIEW product_best_prices"))
+        conn.commit()
+        print("   • Vista anterior borrada")
+
+
+def create_view(conn):
+    """Vista con los datos actuales (WITH DATA: CONCURRENTLY requiere una vista ya poblada)"""
+    conn.execute(text("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS product_best_prices AS
+        SELECT
+            sp.product_id,
+            MIN(sp.price) AS min_price,
+            MAX(sp.price) AS max_price,
+            MAX(sp.price) - MIN(sp.price) AS price_spread,
+            COUNT(*)::integer AS store_count,
+            (ARRAY_AGG(sp.store_id ORDER BY sp.price, sp.store_id))[1] AS cheapest_store_id,
+            MIN(sp.unit_price) AS min_unit_price,
+            p.unit
+        FROM store_prices sp
+        JOIN products p ON p.id = sp.product_id
+        WHERE sp.is_available
+        GROUP BY sp.product_id, p.unit
+        WITH DATA;
+    """))
+    conn.commit()
+
+
+def create_indexes(conn):
+    """Índice único (requerido por REFRESH ... CONCURRENTLY), orden por precio y por precio unitario"""
+    statements = [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_product_best_prices_product ON product_best_prices(product_id);",
+        "CREATE INDEX IF NOT EXISTS idx_product_best_prices_min_price ON product_best_prices(min_price, product_id);",
+        """CREATE INDEX IF NOT EXISTS idx_product_best_prices_unit_price
+           ON product_best_prices(unit, min_unit_price, product_id)
+           WHERE unit IS NOT NULL AND min_unit_price IS NOT NULL;""",
+        "ANALYZE product_best_prices;",
+    ]
+    for sql in statements:
+        conn.execute(text(sql))
+    conn.commit()
+
+
+def show_summary(conn):
+    count, multi_store = conn.execute(text("""
+        SELECT COUNT(*), COUNT(*) FILTER (WHERE store_count > 1) FROM product_best_prices
+    """)).one()
+    print(f"   • {count} productos con precio disponible ({multi_store} en más de una tienda)")
+
+
+def main():
+    print("="*70)
+    print("🏷️  MEJOR PRECIO POR PRODUCTO (product_best_prices)")
+    print("="*70)
+
+    steps = [
+        ("Revisando vista existente", drop_outdated_view),
+        ("Creando vista materializada", create_view),
+        ("Creando índices", create_indexes),
+        ("Verificando", show_summary),
+    ]
+
+    try:
+        with engine.connect() as conn:
+            for i, (title, step) in enumerate(steps, 1):
+                print(f"\n{i}. {title}...")
+                step(conn)
+                print("   ✅ Completado")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    print("\n" + "="*70)
+    print("✅ PROCESO COMPLETADO")
+    print("="*70)
+    print("\nAhora /api/products/search?sort=price ordena por el precio más bajo")
+    print("y sort=unit_price por unidad y precio por kg / l / unidad")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Script para crear la tabla catalog_version en Supabase
+Una fila con la generación del catálogo: los ingest la incrementan y la API
+la lee cada CATALOG_VERSION_POLL_SECONDS para invalidar sus caches (sin
+esta tabla los caches de la API solo expiran por TTL)
+Ejecutar UNA SOLA VEZ; es seguro volver a ejecutarlo
+"""
+
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.database.session import engine
+from app.models import CatalogVersion
+from sqlalchemy import text
+
+
+def create_table(conn):
+    CatalogVersion.__table__.create(bind=conn, checkfirst=True)
+    conn.commit()
+
+
+def seed_row(conn):
+    """La fila única (id = 1); si ya existe se conserva su generación"""
+    conn.execute(text("""
+        INSERT INTO catalog_version (id, generation, updated_at)
+        VALUES (1, 0, now() AT TIME ZONE 'utc')
+        ON CONFLICT (id) DO NOTHING
+    """))
+    conn.commit()
+    generation = conn.execute(text("SELECT generation FROM catalog_version WHERE id = 1")).scalar()
+    print(f"   • Generación actual: {generation}")
+
+
+def main():
+    print("="*70)
+    print("🔢 VERSIÓN DEL CATÁLOGO (catalog_version)")
+    print("="*70)
+
+    steps = [
+        ("Creando tabla", create_table),
+        ("Creando fila inicial", seed_row),
+    ]
+
+    try:
+        with engine.connect() as conn:
+            for i, (title, step) in enumerate(steps, 1):
+                print(f"\n{i}. {title}...")
+                step(conn)
+                print("   ✅ Completado")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    print("\n" + "="*70)
+    print("✅ PROCESO COMPLETADO")
+    print("="*70)
+    print("\nLos ingest ahora invalidan los caches de la API en segundos")
+
+
+if __name__ == "__main__":
+    main()
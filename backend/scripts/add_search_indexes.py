@@ -0,0 +1,112 @@
+"""
+Script para crear los índices de búsqueda trigram (pg_trgm) en Supabase
+Necesario para SEARCH_BACKEND = "trigram" (valor por defecto)
+Ejecutar UNA SOLA VEZ; es seguro volver a ejecutarlo
+"""
+
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.database.session import engine
+from sqlalchemy import text
+
+def create_search_indexes():
+    """Crear extensiones, función f_unaccent e índices GIN trigram"""
+    print("="*70)
+    print("CREANDO ÍNDICES DE BÚSQUEDA (pg_trgm)")
+    print("="*70)
+
+    statements = [
+        # Extensiones necesarias
+        """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        """,
+        """
+        CREATE EXTENSION IF NOT EXISTS unaccent;
+        """,
+
+        # unaccent() no es IMMUTABLE, así que no puede usarse en un índice.
+        # Creamos un wrapper IMMUTABLE que apunta al esquema donde esté
+        # instalada la extensión (en Supabase suele ser "extensions")
+        """
+        DO $$
+        DECLARE
+            ext_schema text;
+        BEGIN
+            SELECT n.nspname INTO ext_schema
+            FROM pg_extension e
+            JOIN pg_namespace n ON n.oid = e.extnamespace
+            WHERE e.extname = 'unaccent';
+
+            EXECUTE format(
+                'CREATE OR REPLACE FUNCTION public.f_unaccent(text) RETURNS text
+                 LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+                 AS $f$ SELECT %I.unaccent(%L::regdictionary, $1) $f$',
+                ext_schema, ext_schema || '.unaccent'
+            );
+        END
+        $$;
+        """,
+
+        # Índice trigram sobre nombre de producto sin tildes
+        """
+        CREATE INDEX IF NOT EXISTS idx_products_name_trgm
+        ON products USING gin (f_unaccent(lower(name)) gin_trgm_ops);
+        """,
+
+        # Índice trigram sobre nombre de marca sin tildes
+        """
+        CREATE INDEX IF NOT EXISTS idx_brands_name_trgm
+        ON brands USING gin (f_unaccent(lower(name)) gin_trgm_ops);
+        """,
+
+        # Índice para el filtro por categoría en la búsqueda
+        """
+        CREATE INDEX IF NOT EXISTS idx_products_category
+        ON products(category_id);
+        """,
+
+        # Productos de las marcas que coinciden con el texto (brand_id IN ...)
+        """
+        CREATE INDEX IF NOT EXISTS idx_products_brand
+        ON products(brand_id);
+        """
+    ]
+
+    with engine.connect() as conn:
+        for i, sql in enumerate(statements, 1):
+            try:
+                print(f"\n{i}. Ejecutando...")
+                conn.execute(text(sql))
+                conn.commit()
+                print("   ✅ Completado")
+            except Exception as e:
+                conn.rollback()
+                print(f"   ⚠️  Error: {e}")
+
+        # Actualizar estadísticas para que el planner use los índices
+        conn.execute(text("ANALYZE products;"))
+        conn.execute(text("ANALYZE brands;"))
+        conn.commit()
+
+    print("\n" + "="*70)
+    print("✅ PROCESO COMPLETADO")
+    print("="*70)
+    print("\nLos índices permiten:")
+    print("  • Búsquedas '%texto%' sin recorrer toda la tabla")
+    print("  • Ignorar tildes y mayúsculas (azucar = Azúcar)")
+    print("  • Ordenar resultados por similitud y tolerar errores de tipeo")
+
+def main():
+    try:
+        create_search_indexes()
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
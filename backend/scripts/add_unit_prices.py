@@ -0,0 +1,108 @@
+"""
+Script para agregar cantidad normalizada y precio unitario en Supabase
+Crea las columnas, las completa para los productos existentes
+(helpers.parse_quantity) y crea el índice usado para ordenar por precio unitario
+Ejecutar UNA SOLA VEZ; es seguro volver a ejecutarlo
+"""
+
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.database.session import engine
+from app.utils.helpers import parse_quantity
+from sqlalchemy import text
+
+BATCH_SIZE = 1000
+
+
+def add_columns(conn):
+    """Columnas nuevas en products y store_prices"""
+    statements = [
+        "ALTER TABLE products ADD COLUMN IF NOT EXISTS unit_quantity NUMERIC(10, 3);",
+        "ALTER TABLE products ADD COLUMN IF NOT EXISTS unit TEXT;",
+        "ALTER TABLE store_prices ADD COLUMN IF NOT EXISTS unit_price NUMERIC(12, 2);",
+    ]
+    for sql in statements:
+        conn.execute(text(sql))
+    conn.commit()
+
+
+def backfill_quantities(conn) -> int:
+    """Extraer cantidad y unidad del nombre de cada producto"""
+    rows = conn.execute(text("SELECT id, name FROM products")).all()
+
+    updates = []
+    for product_id, name in rows:
+        parsed = parse_quantity(name)
+        if parsed:
+            updates.append({"id": product_id, "quantity": parsed[0], "unit": parsed[1]})
+
+    for start in range(0, len(updates), BATCH_SIZE):
+        conn.execute(
+            text("UPDATE products SET unit_quantity = :quantity, unit = :unit WHERE id = :id"),
+            updates[start:start + BATCH_SIZE]
+        )
+        conn.commit()
+
+    print(f"   • {len(updates)} de {len(rows)} productos con cantidad reconocida")
+    return len(updates)
+
+
+def backfill_unit_prices(conn) -> int:
+    """Precio por kg / l / unidad (mismo redondeo que helpers.compute_unit_price)"""
+    result = conn.execute(text("""
+        UPDATE store_prices sp
+        SET unit_price = round(sp.price / p.unit_quantity, 2)
+        FROM products p
+        WHERE p.id = sp.product_id AND p.unit_quantity > 0
+    """))
+    conn.commit()
+    print(f"   • {result.rowcount} precios con precio unitario")
+    return result.rowcount
+
+
+def create_unit_price_index(conn):
+    """Menor precio unitario disponible por producto (orden de búsqueda)"""
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS idx_store_prices_unit_price
+        ON store_prices(product_id, unit_price) WHERE is_available;
+    """))
+    conn.execute(text("ANALYZE store_prices;"))
+    conn.commit()
+
+
+def main():
+    print("="*70)
+    print("📏 CANTIDADES Y PRECIOS UNITARIOS")
+    print("="*70)
+
+    steps = [
+        ("Agregando columnas", add_columns),
+        ("Extrayendo cantidades de los nombres", backfill_quantities),
+        ("Calculando precios unitarios", backfill_unit_prices),
+        ("Creando índice de precio unitario", create_unit_price_index),
+    ]
+
+    try:
+        with engine.connect() as conn:
+            for i, (title, step) in enumerate(steps, 1):
+                print(f"\n{i}. {title}...")
+                step(conn)
+                print("   ✅ Completado")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    print("\n" + "="*70)
+    print("✅ PROCESO COMPLETADO")
+    print("="*70)
+    print("\nAhora /api/products/search?sort=unit_price ordena por precio por kg / l / unidad")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Benchmark de /api/cart/calculate: latencia vs tamaño del carrito
+Compara el cálculo anterior (una consulta por tienda x producto) con el
+actual (una consulta para todos los precios) y verifica que den lo mismo.
+Luego mide solo el CPU del totalizado en memoria: suma en Decimal vs
+céntimos enteros, con carritos grandes y resultados idénticos.
+"""
+
+import sys
+import time
+import random
+import statistics
+from pathlib import Path
+from decimal import Decimal
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import event
+from app.database.session import SessionLocal, engine
+from app.models import Product, StorePrice
+from app.models.store import Store
+from app.schemas.cart import CartItem, CartTotalsResponse, StoreTotalResponse
+from app.services.cart_pricing import fetch_stores, fetch_price_map, compute_cart_totals
+from app.utils.money import to_cents
+
+CART_SIZES = [1, 5, 10, 25, 50, 100]
+CPU_CART_SIZES = [100, 500, 1000, 5000]
+REPETITIONS = 5
+CPU_REPETITIONS = 200
+
+
+def legacy_cart_totals(db, items):
+    """Implementación anterior: una consulta por cada par (tienda, producto)"""
+    stores = db.query(Store).order_by(Store.id).all()
+    totals = []
+
+    for store in stores:
+        total = Decimal(0)
+        available = 0
+        unavailable = 0
+
+        for item in items:
+            price_info = db.query(StorePrice).filter(
+                StorePrice.product_id == item.product_id,
+                StorePrice.store_id == store.id
+            ).first()
+
+            if price_info and price_info.is_available:
+                total += price_info.price * item.quantity
+                available += 1
+            else:
+                unavailable += 1
+
+        totals.append(StoreTotalResponse(
+            store_id=store.id,
+            store_name=store.name,
+            total=total,
+            items_available=available,
+            items_unavailable=unavailable
+        ))
+
+    totals.sort(key=lambda x: x.total)
+    return CartTotalsResponse(totals=totals)
+
+
+def decimal_cart_totals(stores, items, prices):
+    """Totalizado anterior en memoria: Decimal por item y por tienda"""
+    totals = []
+
+    for store_id, store_name in stores:
+        total = Decimal(0)
+        available = 0
+        unavailable = 0
+
+        for item in items:
+            price_info = prices.get(item.product_id, {}).get(store_id)
+
+            if price_info and price_info[1]:
+                total += price_info[0] * item.quantity
+                available += 1
+            else:
+                unavailable += 1
+
+        totals.append(StoreTotalResponse(
+            store_id=store_id,
+            store_name=store_name,
+            total=total,
+            items_available=available,
+            items_unavailable=unavailable
+        ))
+
+    totals.sort(key=lambda x: x.total)
+    return CartTotalsResponse(totals=totals)
+
+
+def measure_cpu(operation):
+    """Tiempo de CPU por ejecución en ms (mediana) y el resultado"""
+    timings = []
+    result = None
+    for _ in range(CPU_REPETITIONS):
+        start = time.process_time()
+        result = operation()
+        timings.append((time.process_time() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def cpu_benchmark(product_ids) -> bool:
+    """Decimal vs céntimos con los mismos precios (sin contar la consulta)"""
+    db = SessionLocal()
+    try:
+        stores = fetch_stores(db)
+        rows = db.query(
+            StorePrice.product_id, StorePrice.store_id, StorePrice.price, StorePrice.is_available
+        ).all()
+    finally:
+        db.close()
+
+    decimal_prices = {}
+    cents_prices = {}
+    for product_id, store_id, price, is_available in rows:
+        decimal_prices.setdefault(product_id, {})[store_id] = (price, is_available)
+        cents_prices.setdefault(product_id, {})[store_id] = (to_cents(price), is_available)
+
+    print(f"\nCPU del totalizado ({len(stores)} tiendas)")
+    print(f"\n{'items':>6} | {'Decimal (ms)':>13} | {'céntimos (ms)':>14} | {'mejora':>7} | igual")
+    print("-"*70)
+
+    all_equal = True
+    for size in CPU_CART_SIZES:
+        items = [
+            CartItem(product_id=pid, quantity=random.randint(1, 5))
+            for pid in random.choices(product_ids, k=size)
+        ]
+
+        decimal_ms, expected = measure_cpu(lambda: decimal_cart_totals(stores, items, decimal_prices))
+        cents_ms, current = measure_cpu(lambda: compute_cart_totals(stores, items, cents_prices))
+
+        equal = expected.model_dump_json() == current.model_dump_json()
+        all_equal = all_equal and equal
+        speedup = decimal_ms / cents_ms if cents_ms else float("inf")
+
+        print(f"{size:>6} | {decimal_ms:>13.2f} | {cents_ms:>14.2f} | {speedup:>6.1f}x | "
+              f"{'✅' if equal else '❌'}")
+
+    return all_equal
+
+
+def measure(operation):
+    """Ejecutar varias veces; retorna (mediana en ms, consultas, resultado)"""
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    timings = []
+    result = None
+    for _ in range(REPETITIONS):
+        db = SessionLocal()
+        try:
+            db.connection()
+            statements.clear()
+            event.listen(engine, "before_cursor_execute", count)
+            start = time.perf_counter()
+            result = operation(db)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+            db.close()
+
+    return statistics.median(timings), len(statements), result
+
+
+def main():
+    print("="*70)
+    print("⏱️  BENCHMARK DE TOTALES DE CARRITO")
+    print("="*70)
+
+    db = SessionLocal()
+    try:
+        product_ids = [pid for (pid,) in db.query(Product.id).all()]
+    finally:
+        db.close()
+
+    if not product_ids:
+        print("\n⚠️  No hay productos en la base de datos")
+        return False
+
+    random.seed(42)
+    all_equal = True
+
+    print(f"\n{'items':>6} | {'anterior (ms)':>14} {'consultas':>10} | {'actual (ms)':>12} {'consultas':>10} | igual")
+    print("-"*70)
+
+    for size in CART_SIZES:
+        items = [
+            CartItem(product_id=pid, quantity=random.randint(1, 5))
+            for pid in random.sample(product_ids, min(size, len(product_ids)))
+        ]
+
+        legacy_ms, legacy_queries, legacy = measure(lambda db: legacy_cart_totals(db, items))
+        # Mismo cálculo que /calculate sin la matriz de precios en memoria
+        current_ms, current_queries, current = measure(
+            lambda db: compute_cart_totals(
+                fetch_stores(db), items, fetch_price_map(db, (item.product_id for item in items))
+            )
+        )
+
+        equal = legacy.model_dump() == current.model_dump()
+        all_equal = all_equal and equal
+
+        print(f"{len(items):>6} | {legacy_ms:>14.1f} {legacy_queries:>10} | "
+              f"{current_ms:>12.1f} {current_queries:>10} | {'✅' if equal else '❌'}")
+
+    return cpu_benchmark(product_ids) and all_equal
+
+
+if __name__ == "__main__":
+    ok = main()
+    print("\nResultado:", "✔ OK" if ok else "✘ ERROR")
+    sys.exit(0 if ok else 1)
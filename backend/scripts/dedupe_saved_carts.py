@@ -0,0 +1,135 @@
+"""
+Script para deduplicar los carritos guardados en search_queries
+Agrega content_hash / seen_count / last_seen_at, calcula el hash de los
+carritos existentes, deja UNA fila por contenido (la más antigua, con el
+contador acumulado) y crea el índice único usado por ON CONFLICT
+Ejecutar UNA SOLA VEZ; es seguro volver a ejecutarlo
+"""
+
+import sys
+from pathlib import Path
+from collections import defaultdict
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.database.session import engine
+from app.schemas.cart import SaveCartRequest
+from app.services.cart_saves import canonical_cart
+from sqlalchemy import text, bindparam
+
+BATCH_SIZE = 1000
+
+
+def add_columns(conn):
+    """Columnas nuevas en search_queries"""
+    statements = [
+        "ALTER TABLE search_queries ADD COLUMN IF NOT EXISTS content_hash TEXT;",
+        "ALTER TABLE search_queries ADD COLUMN IF NOT EXISTS seen_count INTEGER NOT NULL DEFAULT 1;",
+        "ALTER TABLE search_queries ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP;",
+        "UPDATE search_queries SET last_seen_at = created_at WHERE last_seen_at IS NULL;",
+    ]
+    for sql in statements:
+        conn.execute(text(sql))
+    conn.commit()
+
+
+def hash_carts(conn) -> dict:
+    """Hash canónico de cada carrito; retorna hash -> [(id, seen_count, last_seen_at)]"""
+    rows = conn.execute(text("""
+        SELECT id, query_data, seen_count, last_seen_at FROM search_queries
+        WHERE query_data->>'type' = 'cart'
+        ORDER BY id
+    """)).all()
+
+    groups = defaultdict(list)
+    for row_id, query_data, seen_count, last_seen_at in rows:
+        cart = SaveCartRequest(items=query_data.get('items') or [], totals=query_data.get('totals') or {})
+        _, content_hash = canonical_cart(cart)
+        groups[content_hash].append((row_id, seen_count, last_seen_at))
+
+    print(f"   • {len(rows)} carritos, {len(groups)} distintos")
+    return groups
+
+
+def merge_duplicates(conn, groups: dict):
+    """Conservar la fila más antigua de cada hash (con el contador acumulado) y borrar las demás"""
+    keep = []
+    remove = []
+    for content_hash, rows in groups.items():
+        seen = [last_seen_at for _, _, last_seen_at in rows if last_seen_at]
+        keep.append({
+            "id": rows[0][0],
+            "hash": content_hash,
+            "count": sum(seen_count or 1 for _, seen_count, _ in rows),
+            "last_seen": max(seen) if seen else None
+        })
+        remove.extend(row_id for row_id, _, _ in rows[1:])
+
+    # Liberar los hashes antes de asignarlos (por si el script se repite)
+    conn.execute(text("UPDATE search_queries SET content_hash = NULL WHERE query_data->>'type' = 'cart'"))
+
+    for start in range(0, len(remove), BATCH_SIZE):
+        conn.execute(
+            text("DELETE FROM search_queries WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": remove[start:start + BATCH_SIZE]}
+        )
+
+    for start in range(0, len(keep), BATCH_SIZE):
+        conn.execute(text("""
+            UPDATE search_queries
+            SET content_hash = :hash,
+                seen_count = :count,
+                last_seen_at = COALESCE(:last_seen, last_seen_at)
+            WHERE id = :id
+        """), keep[start:start + BATCH_SIZE])
+
+    conn.commit()
+    print(f"   • {len(remove)} filas duplicadas eliminadas")
+
+
+def create_hash_index(conn):
+    """Índice único para INSERT ... ON CONFLICT (content_hash)"""
+    conn.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_search_queries_content_hash
+        ON search_queries(content_hash);
+    """))
+    conn.execute(text("ANALYZE search_queries;"))
+    conn.commit()
+
+
+def main():
+    print("="*70)
+    print("🛒 DEDUPLICACIÓN DE CARRITOS GUARDADOS")
+    print("="*70)
+
+    try:
+        with engine.connect() as conn:
+            print("\n1. Agregando columnas...")
+            add_columns(conn)
+            print("   ✅ Completado")
+
+            print("\n2. Calculando hash de los carritos...")
+            groups = hash_carts(conn)
+            print("   ✅ Completado")
+
+            print("\n3. Fusionando carritos repetidos...")
+            merge_duplicates(conn, groups)
+            print("   ✅ Completado")
+
+            print("\n4. Creando índice único...")
+            create_hash_index(conn)
+            print("   ✅ Completado")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    print("\n" + "="*70)
+    print("✅ PROCESO COMPLETADO")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
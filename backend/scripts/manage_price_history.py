@@ -0,0 +1,97 @@
+"""
+Script para crear y mantener el historial de precios (price_history)
+- Crea la tabla particionada por mes (si no existe)
+- Crea las particiones del mes actual y de los siguientes
+- La primera vez, copia los precios actuales de store_prices como punto
+  de partida del historial
+- Desconecta las particiones más viejas que PRICE_HISTORY_RETENTION_MONTHS
+  (con --drop además las borra)
+Ejecutar una vez y luego mensualmente (cron); es seguro volver a ejecutarlo.
+Los ingest también crean las particiones que falten.
+"""
+
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.config import settings
+from app.database.session import engine
+from app.models import PriceHistory
+from app.services.price_history import ensure_partitions, detach_old_partitions
+from sqlalchemy import text
+
+
+def create_table(conn):
+    """Tabla padre particionada (PARTITION BY RANGE (recorded_at))"""
+    PriceHistory.__table__.create(bind=conn, checkfirst=True)
+    conn.commit()
+
+
+def create_partitions(conn):
+    created = ensure_partitions(conn)
+    print(f"   • {len(created)} particiones nuevas: {', '.join(created) or '-'}")
+
+
+def seed_current_prices(conn):
+    """Precios actuales como primer punto de cada producto (solo si está vacía)"""
+    if conn.execute(text("SELECT EXISTS (SELECT 1 FROM price_history)")).scalar():
+        print("   • El historial ya tiene datos, se omite")
+        return
+    result = conn.execute(text("""
+        INSERT INTO price_history (product_id, store_id, price, is_available, recorded_at)
+        SELECT product_id, store_id, price, COALESCE(is_available, true), now() AT TIME ZONE 'utc'
+        FROM store_prices
+    """))
+    conn.commit()
+    print(f"   • {result.rowcount} precios copiados de store_prices")
+
+
+def detach_partitions(conn, drop: bool):
+    detached = detach_old_partitions(conn, drop=drop)
+    action = "borradas" if drop else "desconectadas"
+    print(f"   • {len(detached)} particiones {action} "
+          f"(retención {settings.PRICE_HISTORY_RETENTION_MONTHS} meses): {', '.join(detached) or '-'}")
+
+
+def analyze(conn):
+    conn.execute(text("ANALYZE price_history;"))
+    conn.commit()
+
+
+def main():
+    drop = "--drop" in sys.argv
+
+    print("="*70)
+    print("📈 HISTORIAL DE PRECIOS (price_history)")
+    print("="*70)
+
+    steps = [
+        ("Creando tabla particionada", create_table),
+        ("Creando particiones", create_partitions),
+        ("Copiando precios actuales", seed_current_prices),
+        ("Aplicando retención", lambda conn: detach_partitions(conn, drop)),
+        ("Actualizando estadísticas", analyze),
+    ]
+
+    try:
+        with engine.connect() as conn:
+            for i, (title, step) in enumerate(steps, 1):
+                print(f"\n{i}. {title}...")
+                step(conn)
+                print("   ✅ Completado")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    print("\n" + "="*70)
+    print("✅ PROCESO COMPLETADO")
+    print("="*70)
+    print("\nHistorial disponible en /api/products/{id}/history?days=90")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Prueba de sesiones de carrito después de un ingest en otro proceso
+Crea una sesión por la API, un proceso hijo (como un script de ingest)
+cambia el precio de un producto del carrito e incrementa catalog_version,
+y GET /api/cart/sessions/{id} debe dar lo mismo que /api/cart/calculate
+con los precios nuevos.
+Usa la base de datos de DATABASE_URL: MODIFICA UN PRECIO y lo restaura al
+terminar.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+# La API debe ver el cambio rápido (antes de importar la configuración)
+os.environ.setdefault("CATALOG_VERSION_POLL_SECONDS", "0.2")
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database.session import SessionLocal, engine
+from app.models import CatalogVersion, StorePrice
+from app.services.catalog_version import catalog_generation
+
+WAIT_SECONDS = 5.0
+
+# Lo que corre el proceso hijo: actualizar un precio como un ingest
+SET_PRICE_CODE = """
+import sys
+from decimal import Decimal
+sys.path.insert(0, {root!r})
+from app.database.session import SessionLocal
+from app.models import StorePrice
+from app.services.catalog_version import bump_catalog_generation
+db = SessionLocal()
+store_price = db.query(StorePrice).filter_by(product_id={product_id}, store_id={store_id}).one()
+store_price.price = Decimal({price!r})
+db.commit()
+print(bump_catalog_generation(db))
+db.close()
+"""
+
+
+def set_price_in_other_process(product_id: int, store_id: int, price) -> int:
+    code = SET_PRICE_CODE.format(root=str(root_dir), product_id=product_id, store_id=store_id, price=str(price))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def wait_for(generation: int) -> bool:
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        if catalog_generation() == generation:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def cart_items(db):
+    """Un producto disponible (el que cambia de precio) y algunos más"""
+    changed = db.query(StorePrice).filter(StorePrice.is_available.is_(True)).order_by(StorePrice.id).first()
+    others = db.query(StorePrice.product_id).filter(
+        StorePrice.product_id != changed.product_id
+    ).distinct().limit(3).all()
+    items = [{"product_id": changed.product_id, "quantity": 2}]
+    items += [{"product_id": product_id, "quantity": 1} for (product_id,) in others]
+    return changed, items
+
+
+def same_totals(client, session_id, items) -> bool:
+    session = client.get(f"/api/cart/sessions/{session_id}").json()
+    calculated = client.post("/api/cart/calculate", json={"items": items}).json()
+    return session["totals"] == calculated["totals"]
+
+
+def main():
+    print("="*70)
+    print("🛒 PRUEBA DE SESIONES DE CARRITO TRAS UN INGEST EN OTRO PROCESO")
+    print("="*70)
+
+    CatalogVersion.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    changed, items = cart_items(db)
+    original_price = changed.price
+    db.close()
+
+    results = []
+    with TestClient(app) as client:
+        try:
+            session_id = client.post("/api/cart/sessions", json={"items": items}).json()["session_id"]
+            before = client.get(f"/api/cart/sessions/{session_id}").json()["totals"]
+            print(f"\n1. Sesión creada con {len(items)} productos")
+            results.append(same_totals(client, session_id, items))
+
+            print(f"\n2. Otro proceso cambia el precio del producto {changed.product_id} "
+                  f"en la tienda {changed.store_id}: {original_price} → {original_price + 1}")
+            generation = set_price_in_other_process(changed.product_id, changed.store_id, original_price + 1)
+            seen = wait_for(generation)
+            print(f"   {'✅' if seen else '❌'} la API ve la generación {generation}")
+            results.append(seen)
+
+            print("\n3. La sesión se vuelve a preciar...")
+            after = client.get(f"/api/cart/sessions/{session_id}").json()["totals"]
+            equal = same_totals(client, session_id, items)
+            print(f"   {'✅' if after != before else '❌'} totales de la sesión actualizados")
+            print(f"   {'✅' if equal else '❌'} sesión == /calculate")
+            results += [after != before, equal]
+        finally:
+            set_price_in_other_process(changed.product_id, changed.store_id, original_price)
+            print(f"\n4. Precio restaurado a {original_price}")
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    ok = main()
+    print("\nResultado:", "✔ OK" if ok else "✘ ERROR")
+    sys.exit(0 if ok else 1)
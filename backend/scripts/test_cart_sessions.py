@@ -0,0 +1,100 @@
+"""
+Prueba de propiedad de las sesiones de carrito
+Aplica secuencias aleatorias de cambios (add, remove, set), con y sin
+tienda elegida, y después de cada uno compara los totales incrementales
+(y la selección) con compute_cart_totals sobre los mismos items.
+Corre en memoria, sin base de datos.
+"""
+
+import sys
+import random
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.schemas.cart import CartDelta
+from app.services.cart_pricing import compute_cart_totals
+from app.services.cart_sessions import CartSession
+
+TRIALS = 300
+DELTAS_PER_TRIAL = 40
+PRODUCTS = 30
+
+
+def random_catalog(rng: random.Random):
+    """Tiendas y precios aleatorios; algunos productos faltan o no están disponibles"""
+    stores = [(store_id, f"Tienda {store_id}") for store_id in range(1, rng.randint(1, 6) + 1)]
+    prices = {}
+    for product_id in range(1, PRODUCTS + 1):
+        for store_id, _ in stores:
+            if rng.random() < 0.8:
+                cents = rng.randint(10, 50000)
+                prices.setdefault(product_id, {})[store_id] = (cents, rng.random() < 0.85)
+    return stores, prices
+
+
+def random_store_id(rng: random.Random):
+    """Mitad de las líneas libres; algunas elegidas en tiendas que no existen"""
+    return None if rng.random() < 0.5 else rng.randint(1, 7)
+
+
+def random_delta(rng: random.Random) -> CartDelta:
+    return CartDelta(
+        op=rng.choice(["add", "add", "set", "remove"]),
+        product_id=rng.randint(1, PRODUCTS + 3),  # algunos sin precios
+        quantity=rng.randint(-1, 5),
+        store_id=random_store_id(rng)
+    )
+
+
+def same_totals(session: CartSession, stores, prices) -> bool:
+    """Totales de la sesión == cálculo completo (incluida la representación JSON)"""
+    incremental = session.response()
+    full = compute_cart_totals(stores, session.items(), prices)
+    fields = {"totals", "selection"}
+    return incremental.model_dump_json(include=fields) == full.model_dump_json(include=fields)
+
+
+def run_trial(seed: int) -> bool:
+    rng = random.Random(seed)
+    stores, prices = random_catalog(rng)
+    session = CartSession(f"prueba-{seed}", stores, generation=0)
+
+    for step in range(DELTAS_PER_TRIAL):
+        deltas = [random_delta(rng) for _ in range(rng.randint(1, 3))]
+        missing = session.missing_prices(deltas)
+        session.add_prices(prices, missing)
+        for delta in deltas:
+            session.apply(delta)
+
+        if not same_totals(session, stores, prices):
+            print(f"   ❌ semilla {seed}, paso {step}: {deltas}")
+            return False
+
+        # De vez en cuando cambia el catálogo y la sesión se vuelve a preciar
+        if rng.random() < 0.05:
+            stores, prices = random_catalog(rng)
+            session.reprice(stores, prices, session.generation + 1)
+            if not same_totals(session, stores, prices):
+                print(f"   ❌ semilla {seed}, paso {step}: después de volver a preciar")
+                return False
+
+    return True
+
+
+def main():
+    print("="*70)
+    print("🛒 PRUEBA DE SESIONES DE CARRITO (totales incrementales)")
+    print("="*70)
+
+    failures = sum(1 for seed in range(TRIALS) if not run_trial(seed))
+    print(f"\n{TRIALS - failures}/{TRIALS} secuencias con totales y selección idénticos "
+          f"({DELTAS_PER_TRIAL} pasos cada una, con líneas libres y con tienda elegida)")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    ok = main()
+    print("\nResultado:", "✔ OK" if ok else "✘ ERROR")
+    sys.exit(0 if ok else 1)
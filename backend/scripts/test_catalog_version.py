@@ -0,0 +1,105 @@
+"""
+Prueba de la versión del catálogo entre procesos
+Un proceso hijo (como un script de ingest) incrementa catalog_version y
+este proceso (como la API), que la lee en segundo plano, debe ver el
+cambio y descartar las entradas del cache de respuestas.
+Usa la base de datos de DATABASE_URL (crea catalog_version si falta).
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.database.session import engine
+from app.models import CatalogVersion
+from app.services.catalog_version import (
+    catalog_generation, on_catalog_change, start_catalog_version_poll, stop_catalog_version_poll
+)
+from app.services.response_cache import ResponseCache
+
+POLL_SECONDS = 0.2
+WAIT_SECONDS = 5.0
+
+# Lo que corre el proceso hijo: el mismo llamado que hacen los ingest
+BUMP_CODE = """
+import sys
+sys.path.insert(0, {root!r})
+from app.database.session import SessionLocal
+from app.services.catalog_version import bump_catalog_generation
+db = SessionLocal()
+print(bump_catalog_generation(db))
+db.close()
+"""
+
+
+def bump_in_other_process() -> int:
+    result = subprocess.run(
+        [sys.executable, "-c", BUMP_CODE.format(root=str(root_dir))],
+        capture_output=True, text=True, timeout=60
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def wait_for(generation: int) -> bool:
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        if catalog_generation() == generation:
+            return True
+        time.sleep(POLL_SECONDS / 2)
+    return False
+
+
+def main():
+    print("="*70)
+    print("🔢 PRUEBA DE VERSIÓN DEL CATÁLOGO ENTRE PROCESOS")
+    print("="*70)
+
+    CatalogVersion.__table__.create(bind=engine, checkfirst=True)
+    changes = []
+    on_catalog_change(changes.append)
+    start_catalog_version_poll(POLL_SECONDS)
+    results = []
+    try:
+        time.sleep(POLL_SECONDS * 2)
+        cache = ResponseCache(max_entries=10, ttl_seconds=3600)
+        cache.set("detalle", "precio viejo", catalog_generation())
+        before = catalog_generation()
+
+        print("\n1. Otro proceso incrementa la versión...")
+        generation = bump_in_other_process()
+        print(f"   • Generación {before} → {generation}")
+        results.append(generation > before)
+
+        print("\n2. Este proceso ve el cambio...")
+        seen = wait_for(generation)
+        print(f"   {'✅' if seen else '❌'} generación local {catalog_generation()}")
+        results.append(seen)
+        results.append(changes[-1:] == [generation])
+
+        print("\n3. El cache descarta la entrada anterior...")
+        invalidated = cache.get("detalle") is None
+        print(f"   {'✅' if invalidated else '❌'} entrada descartada")
+        results.append(invalidated)
+
+        print("\n4. Dos incrementos seguidos...")
+        bump_in_other_process()
+        generation = bump_in_other_process()
+        seen = wait_for(generation)
+        print(f"   {'✅' if seen else '❌'} generación local {catalog_generation()}")
+        results.append(seen)
+    finally:
+        stop_catalog_version_poll()
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    ok = main()
+    print("\nResultado:", "✔ OK" if ok else "✘ ERROR")
+    sys.exit(0 if ok else 1)
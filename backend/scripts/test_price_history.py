@@ -0,0 +1,155 @@
+"""
+Prueba del historial de precios sin base de datos
+- add_months: cambios de año y meses negativos
+- ensure_partitions / detach_old_partitions: qué meses se crean y cuáles
+  se desconectan en los bordes de la retención (con una BD simulada que
+  solo registra el SQL)
+- PriceHistoryRecorder.change: cuándo un ingest agrega una fila
+"""
+
+import sys
+import re
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.models import StorePrice
+from app.services.price_history import (
+    add_months, partition_name, ensure_partitions, detach_old_partitions, PriceHistoryRecorder
+)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeDB:
+    """Particiones en memoria; registra cada sentencia ejecutada"""
+
+    def __init__(self, partitions):
+        self.partitions = set(partitions)
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, statement):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            return FakeResult(sorted(self.partitions))
+        self.statements.append(sql)
+        created = re.match(r"CREATE TABLE IF NOT EXISTS (\w+)", sql)
+        detached = re.match(r"ALTER TABLE price_history DETACH PARTITION (\w+)", sql)
+        if created:
+            self.partitions.add(created.group(1))
+        if detached:
+            self.partitions.discard(detached.group(1))
+        return FakeResult([])
+
+    def commit(self):
+        self.commits += 1
+
+
+def check(name: str, ok: bool) -> bool:
+    print(f"   {'✅' if ok else '❌'} {name}")
+    return ok
+
+
+def test_add_months():
+    print("\n1. add_months")
+    results = [
+        check("enero + 1 = febrero", add_months(date(2024, 1, 1), 1) == date(2024, 2, 1)),
+        check("diciembre + 1 = enero del año siguiente", add_months(date(2024, 12, 1), 1) == date(2025, 1, 1)),
+        check("enero - 1 = diciembre del año anterior", add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)),
+        check("marzo - 14 = enero del año anterior", add_months(date(2024, 3, 1), -14) == date(2023, 1, 1)),
+    ]
+    months = [date(year, month, 1) for year in range(2020, 2027) for month in range(1, 13)]
+    results.append(check(
+        "ida y vuelta en 7 años x ±36 meses",
+        all(add_months(add_months(month, k), -k) == month for month in months for k in range(-36, 37))
+    ))
+    return all(results)
+
+
+def test_ensure_partitions():
+    print("\n2. ensure_partitions")
+    db = FakeDB([partition_name(date(2024, 11, 1))])
+    created = ensure_partitions(db, months_ahead=2, today=date(2024, 11, 30))
+    again = ensure_partitions(db, months_ahead=2, today=date(2024, 11, 30))
+    return all([
+        check("crea solo los meses que faltan (cruza el año)",
+              created == ["price_history_y2024m12", "price_history_y2025m01"]),
+        check("límites [1 de diciembre, 1 de enero)",
+              "FROM ('2024-12-01') TO ('2025-01-01')" in db.statements[0]),
+        check("segunda ejecución no crea nada", again == []),
+        check("un commit por ejecución", db.commits == 2),
+    ])
+
+
+def test_detach_old_partitions():
+    print("\n3. detach_old_partitions")
+    months = [date(2024, month, 1) for month in range(8, 13)]
+    names = [partition_name(month) for month in months] + ["price_history_default"]
+
+    # Retención de 3 meses el 10/01/2025: corte en 01/10/2024. Septiembre
+    # termina justo en el corte (se desconecta); octubre todavía no
+    db = FakeDB(names)
+    detached = detach_old_partitions(db, retention_months=3, today=date(2025, 1, 10))
+    dropped_db = FakeDB(names)
+    dropped = detach_old_partitions(dropped_db, retention_months=3, drop=True, today=date(2025, 1, 10))
+    return all([
+        check("desconecta agosto y septiembre",
+              detached == ["price_history_y2024m08", "price_history_y2024m09"]),
+        check("conserva octubre en adelante y las que no son mensuales",
+              "price_history_y2024m10" in db.partitions and "price_history_default" in db.partitions),
+        check("sin drop no borra tablas", not any(sql.startswith("DROP") for sql in db.statements)),
+        check("con drop borra las mismas",
+              dropped == detached
+              and [sql for sql in dropped_db.statements if sql.startswith("DROP")]
+              == [f"DROP TABLE {name}" for name in detached]),
+    ])
+
+
+def test_change():
+    print("\n4. PriceHistoryRecorder.change")
+    current = StorePrice(product_id=1, store_id=2, price=Decimal("4.50"), is_available=True)
+    unknown = StorePrice(product_id=1, store_id=2, price=Decimal("4.50"), is_available=None)
+
+    new_row = PriceHistoryRecorder.change(None, 1, 2, Decimal("4.50"), True)
+    return all([
+        check("producto nuevo en la tienda: fila",
+              new_row is not None and (new_row["product_id"], new_row["store_id"], new_row["price"]) == (1, 2, Decimal("4.50"))),
+        check("mismo precio y disponibilidad: sin fila",
+              PriceHistoryRecorder.change(current, 1, 2, Decimal("4.50"), True) is None),
+        check("mismo precio con otra escala decimal: sin fila",
+              PriceHistoryRecorder.change(current, 1, 2, Decimal("4.5"), True) is None),
+        check("cambio de precio: fila",
+              PriceHistoryRecorder.change(current, 1, 2, Decimal("4.49"), True) is not None),
+        check("deja de estar disponible: fila",
+              PriceHistoryRecorder.change(current, 1, 2, Decimal("4.50"), False)["is_available"] is False),
+        check("disponibilidad NULL equivale a no disponible",
+              PriceHistoryRecorder.change(unknown, 1, 2, Decimal("4.50"), False) is None),
+    ])
+
+
+def main():
+    print("="*70)
+    print("📈 PRUEBA DEL HISTORIAL DE PRECIOS (sin base de datos)")
+    print("="*70)
+
+    results = [test_add_months(), test_ensure_partitions(), test_detach_old_partitions(), test_change()]
+    return all(results)
+
+
+if __name__ == "__main__":
+    ok = main()
+    print("\nResultado:", "✔ OK" if ok else "✘ ERROR")
+    sys.exit(0 if ok else 1)
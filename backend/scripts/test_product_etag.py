@@ -0,0 +1,134 @@
+"""
+Prueba de ETag del detalle de producto con ingest en otro proceso
+- Un proceso hijo (como un script de ingest) cambia un precio e incrementa
+  catalog_version: el ETag anterior ya no debe recibir 304
+- Si la API deja de leer catalog_version, un If-None-Match se valida
+  recalculando el contenido (no se responde 304 desde la memoria)
+Usa la base de datos de DATABASE_URL: MODIFICA UN PRECIO y lo restaura al
+terminar.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+# La API debe ver el cambio rápido (antes de importar la configuración)
+os.environ.setdefault("CATALOG_VERSION_POLL_SECONDS", "0.2")
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.database.session import SessionLocal, engine
+from app.models import CatalogVersion, StorePrice
+from app.services.catalog_version import (
+    catalog_generation, catalog_generation_is_current, stop_catalog_version_poll
+)
+from app.services.product_service import ProductService
+
+WAIT_SECONDS = 5.0
+
+# Lo que corre el proceso hijo: actualizar un precio como un ingest
+SET_PRICE_CODE = """
+import sys
+from decimal import Decimal
+sys.path.insert(0, {root!r})
+from app.database.session import SessionLocal
+from app.models import StorePrice
+from app.services.catalog_version import bump_catalog_generation
+db = SessionLocal()
+store_price = db.query(StorePrice).filter_by(product_id={product_id}, store_id={store_id}).one()
+store_price.price = Decimal({price!r})
+db.commit()
+print(bump_catalog_generation(db))
+db.close()
+"""
+
+
+def set_price_in_other_process(product_id: int, store_id: int, price) -> int:
+    code = SET_PRICE_CODE.format(root=str(root_dir), product_id=product_id, store_id=store_id, price=str(price))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def wait_for(generation: int) -> bool:
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        if catalog_generation() == generation:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def count_detail_queries():
+    """Contar las llamadas a get_product_by_id (cada una consulta la BD)"""
+    calls = []
+    original = ProductService.get_product_by_id
+
+    async def counted(self, product_id):
+        calls.append(product_id)
+        return await original(self, product_id)
+
+    ProductService.get_product_by_id = counted
+    return calls
+
+
+def main():
+    print("="*70)
+    print("🏷️  PRUEBA DE ETAG DEL DETALLE TRAS UN INGEST EN OTRO PROCESO")
+    print("="*70)
+
+    CatalogVersion.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    changed = db.query(StorePrice).filter(StorePrice.is_available.is_(True)).order_by(StorePrice.id).first()
+    product_id, store_id, original_price = changed.product_id, changed.store_id, changed.price
+    db.close()
+    url = f"/api/products/{product_id}"
+
+    results = []
+    with TestClient(app) as client:
+        try:
+            first = client.get(url)
+            etag = first.headers["etag"]
+            cached = client.get(url, headers={"If-None-Match": etag})
+            print(f"\n1. ETag inicial {etag}")
+            print(f"   {'✅' if cached.status_code == 304 else '❌'} If-None-Match vigente → {cached.status_code}")
+            results.append(cached.status_code == 304)
+
+            print(f"\n2. Otro proceso cambia el precio en la tienda {store_id}: "
+                  f"{original_price} → {original_price + 1}")
+            generation = set_price_in_other_process(product_id, store_id, original_price + 1)
+            seen = wait_for(generation)
+            stale = client.get(url, headers={"If-None-Match": etag})
+            new_etag = stale.headers.get("etag")
+            print(f"   {'✅' if seen else '❌'} la API ve la generación {generation}")
+            print(f"   {'✅' if stale.status_code == 200 else '❌'} ETag anterior → {stale.status_code}")
+            print(f"   {'✅' if new_etag != etag else '❌'} ETag nuevo {new_etag}")
+            results += [seen, stale.status_code == 200, new_etag != etag]
+
+            print("\n3. Sin sondeo de catalog_version, un 304 exige recalcular...")
+            stop_catalog_version_poll()
+            time.sleep(3 * settings.CATALOG_VERSION_POLL_SECONDS + 0.3)
+            calls = count_detail_queries()
+            revalidated = client.get(url, headers={"If-None-Match": new_etag})
+            print(f"   {'✅' if not catalog_generation_is_current() else '❌'} generación local marcada como no confirmada")
+            print(f"   {'✅' if revalidated.status_code == 304 and calls else '❌'} "
+                  f"→ {revalidated.status_code} tras {len(calls)} consulta(s)")
+            results += [not catalog_generation_is_current(), revalidated.status_code == 304 and bool(calls)]
+        finally:
+            set_price_in_other_process(product_id, store_id, original_price)
+            print(f"\n4. Precio restaurado a {original_price}")
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    ok = main()
+    print("\nResultado:", "✔ OK" if ok else "✘ ERROR")
+    sys.exit(0 if ok else 1)
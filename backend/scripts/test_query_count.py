@@ -0,0 +1,96 @@
+"""
+Script para verificar el número de consultas SQL por request
+Búsqueda, listado y detalle deben usar un número FIJO de consultas,
+sin importar cuántos productos, precios o tiendas devuelvan (sin N+1)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from contextlib import contextmanager
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import event
+from app.database.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import Product
+from app.services.product_service import ProductService
+
+# Máximo de consultas permitido por operación
+MAX_QUERIES = {
+    "search": 3,   # candidatos, productos + marca + categoría (JOIN), precios + tiendas
+    "list": 2,
+    "detail": 2,
+}
+
+
+@contextmanager
+def count_queries():
+    """Contar las sentencias SQL ejecutadas dentro del bloque"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Los eventos del motor asíncrono se registran en su motor síncrono interno
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def check(name: str, operation) -> bool:
+    """Ejecutar la operación con una sesión nueva (la de la API) y comparar con el límite"""
+    async with AsyncSessionLocal() as db:
+        # Abrir la conexión antes de contar (el pre-ping no cuenta)
+        await db.connection()
+        with count_queries() as statements:
+            result = await operation(ProductService(db))
+        results = len(result) if isinstance(result, list) else 1
+        ok = len(statements) <= MAX_QUERIES[name]
+        icon = "✅" if ok else "❌"
+        print(f"   {icon} {name}: {len(statements)} consultas para {results} productos "
+              f"(máximo {MAX_QUERIES[name]})")
+        if not ok:
+            for statement in statements:
+                print(f"      → {' '.join(statement.split())[:100]}")
+        return ok
+
+
+def main():
+    print("="*70)
+    print("🔎 VERIFICACIÓN DE CONSULTAS POR REQUEST")
+    print("="*70)
+
+    db = SessionLocal()
+    try:
+        sample = db.query(Product).first()
+    finally:
+        db.close()
+
+    if not sample:
+        print("\n⚠️  No hay productos en la base de datos")
+        return False
+
+    term = sample.name.split()[0]
+    print(f"\nTérmino de búsqueda: '{term}' | Producto de detalle: {sample.id}\n")
+
+    async def run_checks():
+        try:
+            return [
+                await check("search", lambda service: service.search_products(term)),
+                await check("list", lambda service: service.list_products(0, 50)),
+                await check("detail", lambda service: service.get_product_by_id(sample.id)),
+            ]
+        finally:
+            await async_engine.dispose()
+
+    return all(asyncio.run(run_checks()))
+
+
+if __name__ == "__main__":
+    ok = main()
+    print("\nResultado:", "✔ OK" if ok else "✘ ERROR")
+    sys.exit(0 if ok else 1)
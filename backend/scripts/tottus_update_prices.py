@@ -14,6 +14,8 @@ from app.database.session import SessionLocal
 from app.scrapers.tottus_scraper import TottusScraper
 from app.services.tottus_service import TottusDataService
 from app.models.store import Store
+from app.services.index_holder import rebuild_active_indexes
+from app.services.best_prices import refresh_best_prices
 
 
 # URLs de categorías de Tottus
@@ -134,6 +136,12 @@ def main():
                 traceback.print_exc()
                 continue
         
+        # Mejor precio por producto (vista materializada)
+        refresh_best_prices(db)
+        
+        # Reconstruir índices en memoria (si este proceso los usa)
+        rebuild_active_indexes()
+        
         # 5. Resumen final
         print("\n" + "="*70)
         print("✅ PROCESO COMPLETADO")
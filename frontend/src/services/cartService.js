@@ -6,7 +6,30 @@ export default {
     return api.post('/api/cart/calculate', { items })
   },
 
+  // Plan de compra más barato repartido en varias tiendas
+  optimizeCart(items, maxStores = 2, storeCost = 0) {
+    return api.post('/api/cart/optimize', {
+      items,
+      max_stores: maxStores,
+      store_cost: storeCost
+    })
+  },
+
+  // Sesión de carrito en el servidor: luego se envían solo los cambios
+  createCartSession(items) {
+    return api.post('/api/cart/sessions', { items })
+  },
+
+  // deltas: [{ op: 'add' | 'remove' | 'set', product_id, quantity, store_id }]
+  // store_id (opcional) indica la línea con tienda elegida; sin él, la línea libre
+  // Retorna 404 si la sesión expiró (crear una nueva con el carrito completo)
+  applyCartDeltas(sessionId, deltas) {
+    return api.post(`/api/cart/sessions/${sessionId}/deltas`, { deltas })
+  },
+
   // Guardar carrito en la base de datos
+  // El ID es el hash del contenido: el backend responde sin esperar el INSERT
+  // y el mismo carrito siempre recibe el mismo ID
   saveCart(cartData) {
     return api.post('/api/cart/save', cartData)
   }
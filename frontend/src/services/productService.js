@@ -2,21 +2,62 @@ import api from './api'
 
 export default {
   // Buscar productos
-  searchProducts(query, categoryId = null) {
+  // sort: 'relevance' (por defecto), 'unit_price' (agrupado por unidad y por
+  // precio por kg / l / unidad)
+  // o 'price' (precio más bajo disponible)
+  // Con includeFacets retorna { items, facets } en vez de una lista
+  searchProducts(query, categoryId = null, sort = 'relevance', includeFacets = false) {
     return api.get('/api/products/search', {
+      params: { q: query, category_id: categoryId, sort, include_facets: includeFacets || undefined }
+    })
+  },
+
+  // Conteos por categoría, marca y tienda para los filtros de búsqueda
+  // (también disponibles con searchProducts(..., includeFacets = true))
+  searchFacets(query, categoryId = null) {
+    return api.get('/api/products/search/facets', {
       params: { q: query, category_id: categoryId }
     })
   },
 
+  // Sugerencias de autocompletado (productos y marcas)
+  suggest(query, limit = 10) {
+    return api.get('/api/products/suggest', {
+      params: { q: query, limit }
+    })
+  },
+
   // Obtener producto por ID
   getProduct(productId) {
     return api.get(`/api/products/${productId}`)
   },
 
+  // Historial de precios por tienda en los últimos `days` días
+  // Retorna { product_id, days, since, stores: [{ store_id, store_name, points }] }
+  getPriceHistory(productId, days = 90) {
+    return api.get(`/api/products/${productId}/history`, {
+      params: { days }
+    })
+  },
+
+  // Obtener varios productos en una sola llamada
+  // Retorna { products, missing_ids }
+  getProductsBatch(productIds) {
+    return api.post('/api/products/batch', { ids: productIds })
+  },
+
   // Listar productos
   listProducts(skip = 0, limit = 50) {
     return api.get('/api/products/', {
       params: { skip, limit }
     })
+  },
+
+  // Listar productos por cursor (cursor vacío = primera página)
+  // Retorna { items, next_cursor }
+  listProductsPage(cursor = '', limit = 50) {
+    return api.get('/api/products/', {
+      params: { cursor, limit }
+    })
   }
 }
\ No newline at end of file